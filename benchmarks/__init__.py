@@ -0,0 +1,11 @@
+"""
+Headless benchmarks for pywindowframes.
+
+Run a single scene:
+    python -m benchmarks.run --windows 50 --elements 20 --frames 600 --output result.json
+
+Run the whole suite (every scene in its own process) and compare with an earlier run:
+    python -m benchmarks.suite --output new.json --compare old.json
+
+Everything runs with SDL_VIDEODRIVER=dummy, so no display is needed.
+"""
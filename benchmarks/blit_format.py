@@ -0,0 +1,103 @@
+"""
+Measures how long blitting a colorkeyed window-like surface onto the display takes, depending on its pixel format.
+
+    python -m benchmarks.blit_format --size 300 200 --blits 2000
+
+"mismatched" is a 24 bit surface, which has to be converted pixel by pixel on every blit, like text rendered by
+pygame.font (8 bit) was before it went through prepare_for_blitting(). "matched" is made by make_surface() in the
+display format, and "matched_rle" is the same surface with RLE acceleration turned on for its colorkey.
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame as pg
+
+import pywindowframes as pwf
+from pywindowframes.surfaces import COLORKEY
+from pywindowframes.surfaces import make_surface
+
+
+def draw_window(surface: pg.Surface):
+    """
+    Border, top bar and a few buttons on a transparent background, roughly what a window surface looks like
+    """
+    w, h = surface.get_size()
+    surface.fill(COLORKEY)
+    pg.draw.rect(surface, (100, 100, 100), (0, 0, w, h), width=3)
+    pg.draw.rect(surface, (60, 60, 60), (0, 0, w, 30))
+    for i in range(6):
+        pg.draw.rect(surface, (150, 150, 150), (10 + i * 45, 40 + i * 20, 40, 16), border_radius=5)
+
+
+def variants(screen: pg.Surface, size) -> dict:
+    mismatched = pg.Surface(size, 0, 24)
+    mismatched.set_colorkey(COLORKEY)
+    draw_window(mismatched)
+
+    matched = make_surface(size, screen)
+    draw_window(matched)
+
+    matched_rle = make_surface(size, screen)
+    draw_window(matched_rle)
+    matched_rle.set_colorkey(COLORKEY, pg.RLEACCEL)
+
+    return {"mismatched": mismatched, "matched": matched, "matched_rle": matched_rle}
+
+
+def time_blits(screen: pg.Surface, surface: pg.Surface, blits: int) -> float:
+    """
+    Returns microseconds per blit
+    """
+    # the first blit of an RLE surface encodes it
+    screen.blit(surface, (0, 0))
+
+    t = time.perf_counter()
+    for i in range(blits):
+        screen.blit(surface, (i % 50, i % 30))
+    return (time.perf_counter() - t) / blits * 1_000_000
+
+
+def run(size=(300, 200), blits=2000, repeats=5) -> dict:
+    pg.init()
+    screen = pg.display.set_mode((1280, 720))
+
+    results = {}
+    for name, surface in variants(screen, size).items():
+        # best of repeats, the other runs are mostly noise from the rest of the system
+        results[name] = min(time_blits(screen, surface, blits) for _ in range(repeats))
+
+    return {
+        "pywindowframes": pwf.__version__,
+        "display_bits": screen.get_bitsize(),
+        "size": list(size),
+        "blits": blits,
+        "us_per_blit": results,
+        "speedup_matched": results["mismatched"] / results["matched"],
+        "speedup_matched_rle": results["mismatched"] / results["matched_rle"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, nargs=2, default=(300, 200))
+    parser.add_argument("--blits", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    result = run(tuple(args.size), args.blits, args.repeats)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Checks that "dirty" compositing draws the same frames as "full" compositing.
+
+    python -m benchmarks.compositing --incremental --occlusion
+
+Two copies of the same scene, each with its own WindowManager and target surface, get the same scripted input.
+The reference is composited in "full" mode, the other in "dirty" mode with the given optimizations, and the two
+surfaces are compared after every frame. Exits with status 1 if any frame differs.
+"""
+import argparse
+import json
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame as pg
+
+import pywindowframes as pwf
+from benchmarks.scenes import InputScript
+from benchmarks.scenes import Scene
+
+
+BACKGROUND = 30, 30, 30
+
+
+def make_scene(screen_size: tuple, windows: int, elements: int, seed: int) -> Scene:
+    # offscreen, in the display format
+    surface = pg.Surface(screen_size).convert()
+    surface.fill(BACKGROUND)
+    scene = Scene(surface, windows, elements, overlap=True, seed=seed, manager=pwf.WindowManager(surface))
+
+    # DynamicSurfaces update on a wall clock interval, which would make the copies update them on different frames.
+    # They are only due on the first frame instead
+    for w in scene.windows:
+        for e in w.elements:
+            if isinstance(e, pwf.DynamicSurface):
+                e.surface_update_interval = 3600
+
+    return scene
+
+
+def run(windows=30, elements=10, frames=600, screen_size=(1280, 720), seed=1, incremental=False, backing=False,
+        occlusion=False, idle=False) -> dict:
+    pg.init()
+    pg.display.set_mode(screen_size)
+
+    reference = make_scene(screen_size, windows, elements, seed)
+    checked = make_scene(screen_size, windows, elements, seed)
+
+    checked.manager.set_compositing_mode("dirty", background=BACKGROUND)
+    checked.manager.set_occlusion_culling(occlusion)
+    checked.manager.set_idle_skipping(idle)
+    for w in checked.windows:
+        w.set_incremental_composition(incremental)
+        w.set_element_backing(backing)
+
+    # the input follows the reference windows, both scenes get the same events
+    script = InputScript(reference, seed)
+
+    differing = []
+    for frame in range(frames):
+        events = script.events(frame)
+
+        reference.screen.fill(BACKGROUND)
+        reference.manager.update(events)
+        checked.manager.update(events)
+
+        reference.manager.drain_events()
+        checked.manager.drain_events()
+
+        if pg.image.tobytes(reference.screen, "RGB") != pg.image.tobytes(checked.screen, "RGB"):
+            differing.append(frame)
+
+    return {
+        "scene": {"windows": windows, "elements_per_window": elements, "screen_size": list(screen_size), "seed": seed},
+        "dirty": {"incremental": incremental, "backing": backing, "occlusion": occlusion, "idle": idle},
+        "frames": frames,
+        "differing_frames": len(differing),
+        "first_differing_frame": differing[0] if differing else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--windows", type=int, default=30)
+    parser.add_argument("--elements", type=int, default=10, help="elements per window")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--screen", type=int, nargs=2, default=(1280, 720))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--incremental", action="store_true", help="incremental composition of all windows")
+    parser.add_argument("--backing", action="store_true", help="shared element layer in all windows")
+    parser.add_argument("--occlusion", action="store_true", help="occlusion culling")
+    parser.add_argument("--idle", action="store_true", help="idle frame skipping")
+    args = parser.parse_args(argv)
+
+    result = run(args.windows, args.elements, args.frames, tuple(args.screen), args.seed, args.incremental,
+                 args.backing, args.occlusion, args.idle)
+    print(json.dumps(result, indent=2))
+
+    if result["differing_frames"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
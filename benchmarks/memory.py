@@ -0,0 +1,103 @@
+"""
+Measures the memory taken per window and per element, and the frame time of a scene made of them.
+
+    python -m benchmarks.memory --windows 200 --elements 50
+
+Python object memory is measured with tracemalloc. Surface pixels are allocated by SDL and are not included there,
+but they are in the RSS growth.
+"""
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame as pg
+
+import pywindowframes as pwf
+from benchmarks.run import peak_rss_kb
+
+
+def traced_bytes(build) -> tuple:
+    """
+    Returns (result of build(), bytes allocated by it that are still alive)
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def make_windows(screen, windows: int) -> list:
+    return [pwf.WindowBase((i % 40 * 20, i % 30 * 20), (300, 200), screen, f"window {i}") for i in range(windows)]
+
+
+def make_elements(windows: list, elements: int) -> list:
+    made = []
+    for w in windows:
+        for e in range(elements):
+            pos = 10 + e % 8 * 34, 40 + e // 8 * 20
+            if e % 2:
+                made.append(pwf.Button(f"b{e}", w, pos, (30, 16), str(e % 10)))
+            else:
+                made.append(pwf.BaseElement(f"e{e}", w, pos, (30, 16)))
+    return made
+
+
+def run(windows=200, elements=50, frames=60) -> dict:
+    pg.init()
+    screen = pg.display.set_mode((1280, 720))
+
+    rss_before = peak_rss_kb()
+    window_list, window_bytes = traced_bytes(lambda: make_windows(screen, windows))
+    element_list, element_bytes = traced_bytes(lambda: make_elements(window_list, elements))
+
+    # first frames make the window chrome and element surfaces
+    for _ in range(3):
+        pwf.update([])
+
+    t = time.perf_counter()
+    for _ in range(frames):
+        pwf.update([])
+    frame_time = (time.perf_counter() - t) / frames
+
+    rss_after = peak_rss_kb()
+
+    return {
+        "pywindowframes": pwf.__version__,
+        "windows": windows,
+        "elements_per_window": elements,
+        "bytes_per_window": window_bytes / windows,
+        "bytes_per_element": element_bytes / max(len(element_list), 1),
+        "rss_growth_kb": rss_after - rss_before if rss_before is not None else None,
+        "frame_ms": frame_time * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--windows", type=int, default=200)
+    parser.add_argument("--elements", type=int, default=50, help="elements per window")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    result = run(args.windows, args.elements, args.frames)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
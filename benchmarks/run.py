@@ -0,0 +1,151 @@
+"""
+Runs a single benchmark scene and reports frame times, throughput and peak memory as JSON.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame as pg
+
+import pywindowframes as pwf
+from benchmarks.scenes import InputScript
+from benchmarks.scenes import Scene
+
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    index = min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes everywhere else
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def run_frames(scene: Scene, script: InputScript, frames: int, start: int = 0) -> list:
+    frame_times = []
+    for frame in range(start, start + frames):
+        events = script.events(frame)
+
+        t = time.perf_counter()
+        scene.screen.fill((30, 30, 30))
+        pwf.update(events)
+        frame_times.append(time.perf_counter() - t)
+
+        pwf.drain_events()
+
+    return frame_times
+
+
+def run(windows=50, elements=20, frames=600, warmup=60, minimized=0.2, static=0.1, overlap=True,
+        screen_size=(2560, 1440), seed=1, memory=True, budget_ms=16.0, profile=False) -> dict:
+    pg.init()
+    screen = pg.display.set_mode(screen_size)
+
+    if memory:
+        tracemalloc.start()
+
+    t = time.perf_counter()
+    scene = Scene(screen, windows, elements, minimized, static, overlap, seed)
+    build_time = time.perf_counter() - t
+
+    script = InputScript(scene, seed)
+
+    # warmup frames create all surfaces and caches
+    run_frames(scene, script, warmup)
+
+    memory_peak = None
+    if memory:
+        memory_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    if profile:
+        pwf.profiling.reset()
+        pwf.profiling.enable()
+
+    frame_times = run_frames(scene, script, frames, warmup)
+    total = sum(frame_times)
+
+    result = {
+        "pywindowframes": pwf.__version__,
+        "python": platform.python_version(),
+        "pygame": pg.version.ver,
+        "scene": {
+            "windows": windows,
+            "elements_per_window": elements,
+            "minimized": minimized,
+            "static": static,
+            "overlap": overlap,
+            "screen_size": list(screen_size),
+            "seed": seed,
+        },
+        "frames": frames,
+        "build_ms": build_time * 1000,
+        "frame_ms": {
+            "mean": total / frames * 1000,
+            "p50": percentile(frame_times, 50) * 1000,
+            "p99": percentile(frame_times, 99) * 1000,
+            "max": max(frame_times) * 1000,
+        },
+        "budget_ms": budget_ms,
+        "frames_over_budget": sum(1 for t in frame_times if t * 1000 > budget_ms),
+        "throughput": {
+            "frames_per_s": frames / total,
+            "windows_per_s": frames * windows / total,
+        },
+        "memory": {
+            "peak_traced_kb": memory_peak // 1024 if memory_peak is not None else None,
+            "peak_rss_kb": peak_rss_kb(),
+        },
+    }
+
+    if profile:
+        pwf.profiling.disable()
+        stats = pwf.profiling.get_stats()
+        result["profile"] = {key: stats[key] for key in ("phases", "elements", "hooks")}
+
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--windows", type=int, default=50)
+    parser.add_argument("--elements", type=int, default=20, help="elements per window")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--minimized", type=float, default=0.2, help="fraction of windows starting minimized")
+    parser.add_argument("--static", type=float, default=0.1, help="fraction of StaticWindows")
+    parser.add_argument("--tiled", action="store_true", help="tile windows instead of scattering them")
+    parser.add_argument("--screen", type=int, nargs=2, default=(2560, 1440))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--budget", type=float, default=16.0, help="frame budget in ms")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc")
+    parser.add_argument("--profile", action="store_true", help="include pywindowframes.profiling stats")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    result = run(args.windows, args.elements, args.frames, args.warmup, args.minimized, args.static,
+                 not args.tiled, tuple(args.screen), args.seed, not args.no_memory, args.budget, args.profile)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Parametric benchmark scenes and the scripted mouse input that drives them.
+"""
+import math
+import random
+
+import pygame as pg
+
+import pywindowframes as pwf
+
+
+ELEMENT_SIZE = 40, 24
+ELEMENT_SPACING = 4
+ELEMENTS_PER_ROW = 8
+
+
+class Scene:
+    def __init__(self, screen: pg.Surface,
+                 windows: int = 50,
+                 elements: int = 20,
+                 minimized: float = 0.2,
+                 static: float = 0.1,
+                 overlap: bool = True,
+                 seed: int = 1,
+                 manager: pwf.WindowManager = None):
+        """
+        :param screen: target surface for all windows
+        :param windows: amount of windows
+        :param elements: amount of elements per window, a mix of Button, BaseElement and DynamicSurface
+        :param minimized: fraction of the windows that start minimized
+        :param static: fraction of the windows that are StaticWindows
+        :param overlap: scatter windows randomly (overlapping) instead of tiling them
+        :param seed: random seed, the same parameters always give the same scene
+        :param manager: WindowManager of the windows, None for the default manager
+        """
+        self.screen = screen
+        self.manager = manager
+        self.random = random.Random(seed)
+        self.windows = []
+        self.buttons = []
+
+        # shared producer surface, so DynamicSurface cost is the element and not the producer
+        self.producer_surface = pg.Surface(ELEMENT_SIZE)
+        self.producer_surface.fill((40, 120, 40))
+
+        for i in range(windows):
+            self.windows.append(self.make_window(i, elements, static, overlap))
+
+        for w in self.random.sample(self.windows, int(windows * minimized)):
+            if w.can_be_minimized:
+                pwf.core.minimize(w)
+
+    def window_size(self, elements: int) -> tuple:
+        columns = min(max(elements, 1), ELEMENTS_PER_ROW)
+        rows = math.ceil(elements / ELEMENTS_PER_ROW)
+        return (columns * (ELEMENT_SIZE[0] + ELEMENT_SPACING) + 20,
+                rows * (ELEMENT_SIZE[1] + ELEMENT_SPACING) + 50)
+
+    def window_position(self, index: int, size: tuple, overlap: bool) -> tuple:
+        screen_w, screen_h = self.screen.get_size()
+        if overlap:
+            return (self.random.randrange(0, max(screen_w - size[0], 1)),
+                    self.random.randrange(0, max(screen_h - size[1], 1)))
+
+        columns = max(screen_w // size[0], 1)
+        return (index % columns) * size[0], (index // columns * size[1]) % max(screen_h - size[1], 1)
+
+    def make_window(self, index: int, elements: int, static: float, overlap: bool):
+        size = self.window_size(elements)
+        pos = self.window_position(index, size, overlap)
+
+        if self.random.random() < static:
+            window = pwf.StaticWindow(pos, size, self.screen, f"static {index}", is_constantly_expanded=True,
+                                      manager=self.manager)
+        else:
+            window = pwf.WindowBase(pos, size, self.screen, f"window {index}", manager=self.manager)
+
+        for e in range(elements):
+            epos = (10 + (e % ELEMENTS_PER_ROW) * (ELEMENT_SIZE[0] + ELEMENT_SPACING),
+                    40 + (e // ELEMENTS_PER_ROW) * (ELEMENT_SIZE[1] + ELEMENT_SPACING))
+            kind = e % 3
+            if kind == 0:
+                self.buttons.append(pwf.Button(f"b{index}_{e}", window, epos, ELEMENT_SIZE, str(e)))
+            elif kind == 1:
+                pwf.BaseElement(f"e{index}_{e}", window, epos, ELEMENT_SIZE)
+            else:
+                pwf.DynamicSurface(f"d{index}_{e}", window, epos, ELEMENT_SIZE,
+                                   surface_to_blit_function=self.producer,
+                                   surface_update_interval=0.25)
+
+        return window
+
+    def producer(self) -> pg.Surface:
+        return self.producer_surface
+
+
+class InputScript:
+    """
+    Deterministic synthetic mouse input, cycling through hovering, dragging a window, clicking buttons and
+    minimizing/maximizing windows. Targets are picked from the live scene, so the input follows windows around.
+    """
+    phases = ("hover", "drag", "click", "minimize")
+    phase_length = 60
+
+    def __init__(self, scene: Scene, seed: int = 1):
+        self.scene = scene
+        self.random = random.Random(seed)
+        self.pos = (0, 0)
+        self.target = None
+
+    def move_to(self, pos) -> pg.event.Event:
+        rel = pos[0] - self.pos[0], pos[1] - self.pos[1]
+        self.pos = pos
+        return pg.event.Event(pg.MOUSEMOTION, pos=pos, rel=rel, buttons=(0, 0, 0))
+
+    def button(self, down: bool) -> pg.event.Event:
+        return pg.event.Event(pg.MOUSEBUTTONDOWN if down else pg.MOUSEBUTTONUP, pos=self.pos, button=1)
+
+    def visible_windows(self, minimized=None) -> list:
+        return [w for w in self.scene.windows
+                if w.is_visible and (minimized is None or w.is_minimized == minimized)]
+
+    def events(self, frame: int) -> list:
+        phase = self.phases[(frame // self.phase_length) % len(self.phases)]
+        step = frame % self.phase_length
+        return getattr(self, phase)(step)
+
+    def hover(self, step: int) -> list:
+        screen_w, screen_h = self.scene.screen.get_size()
+        x = int(screen_w * step / self.phase_length)
+        y = int(screen_h / 2 + math.sin(step / 5) * screen_h / 3)
+        return [self.move_to((x, y))]
+
+    def drag(self, step: int) -> list:
+        if step == 0:
+            windows = self.visible_windows(minimized=False)
+            self.target = self.random.choice(windows) if windows else None
+            if self.target:
+                return [self.move_to((self.target.pos[0] + 10, self.target.pos[1] + 10)), self.button(True)]
+        if step == self.phase_length - 1:
+            return [self.button(False)]
+        return [self.move_to((self.pos[0] + self.random.randint(-8, 8), self.pos[1] + self.random.randint(-8, 8)))]
+
+    def click(self, step: int) -> list:
+        buttons = [b for b in self.scene.buttons if b.window.is_visible and not b.window.is_minimized]
+        if not buttons or step % 4 == 3:
+            return []
+
+        if step % 4 == 0:
+            self.target = self.random.choice(buttons)
+            return [self.move_to((self.target.window.pos[0] + self.target.pos[0] + 2,
+                                  self.target.window.pos[1] + self.target.pos[1] + 2))]
+        return [self.button(step % 4 == 1)]
+
+    def minimize(self, step: int) -> list:
+        if step % 10 == 0:
+            windows = [w for w in self.visible_windows() if w.can_be_minimized]
+            self.target = self.random.choice(windows) if windows else None
+            if self.target:
+                rect = self.target.minimize_button_rect
+                return [self.move_to((self.target.pos[0] + rect.centerx, self.target.pos[1] + rect.centery))]
+        if step % 10 == 1:
+            return [self.button(True)]
+        if step % 10 == 2:
+            return [self.button(False)]
+        return []
@@ -0,0 +1,76 @@
+"""
+Runs a matrix of benchmark scenes, each in its own process, and writes all results as one JSON file.
+With --compare, prints the p50/p99 frame time ratio against an earlier suite result.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+SCENES = [
+    {"windows": windows, "elements": elements}
+    for windows in (10, 50, 200)
+    for elements in (0, 10, 50)
+]
+
+
+def run_scene(scene: dict, frames: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "result.json")
+        command = [sys.executable, "-m", "benchmarks.run",
+                   "--windows", str(scene["windows"]),
+                   "--elements", str(scene["elements"]),
+                   "--frames", str(frames),
+                   "--output", output]
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+        with open(output) as f:
+            return json.load(f)
+
+
+def scene_key(result: dict) -> tuple:
+    return result["scene"]["windows"], result["scene"]["elements_per_window"]
+
+
+def compare(results: list, old_results: list):
+    old = {scene_key(r): r for r in old_results}
+
+    print(f"{'windows':>8} {'elements':>8} {'p50 ms':>8} {'old':>8} {'ratio':>6} {'p99 ms':>8} {'old':>8} {'ratio':>6}")
+    for result in results:
+        key = scene_key(result)
+        if key not in old:
+            continue
+        new_ms = result["frame_ms"]
+        old_ms = old[key]["frame_ms"]
+        print(f"{key[0]:>8} {key[1]:>8} "
+              f"{new_ms['p50']:>8.2f} {old_ms['p50']:>8.2f} {new_ms['p50'] / old_ms['p50']:>6.2f} "
+              f"{new_ms['p99']:>8.2f} {old_ms['p99']:>8.2f} {new_ms['p99'] / old_ms['p99']:>6.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--compare", help="earlier suite result to compare with")
+    args = parser.parse_args(argv)
+
+    results = []
+    for scene in SCENES:
+        result = run_scene(scene, args.frames)
+        results.append(result)
+        print(f"{scene['windows']:>4} windows x {scene['elements']:>3} elements: "
+              f"p50 {result['frame_ms']['p50']:.2f} ms, p99 {result['frame_ms']['p99']:.2f} ms")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,42 @@
 __version__ = 0.147
-print(f"Thank you for using pywindowframes. Please report any indecencies to 79141108+afmelin@users.noreply.github.com."
-      f"\nPywindowframes version: {__version__}")
 
 from .core import WindowBase
 from .core import StaticWindow
+from .core import get_default_manager
+
+from .manager import WindowManager
 
 from .core import open_or_close_window
 from .core import poll_queue
 from .core import pop_event
+from .core import drain_events
+from .core import configure_event_queue
 from .core import post_event
+from .core import on
+from .core import off
 from .core import update
+from .core import get_input
+from .core import set_compositing_mode
+from .core import invalidate_composite
+from .core import set_idle_skipping
+from .core import set_occlusion_culling
+from .core import is_idle
+from .core import suggest_tick_rate
 
 from .elements import BaseElement
 from .elements import Button
 from .elements import DynamicSurface
+
+from .events import Event
+from .events import PYWINDOWFRAMES_CLICKED
+from .events import WAS_CLICKED
+
+from .fonts import get_font
+from .fonts import render_text
+from .fonts import set_text_cache_size
+from .fonts import clear_text_cache
+
+from . import profiling
+from . import tracing
+from . import producers
+from .producers import UNCHANGED
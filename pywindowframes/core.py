@@ -12,16 +12,27 @@ TODO:
 """
 import random
 import pygame as pg
-from time import time
+from . import profiling
+from . import tracing
+from .tracing import traced
+from .fonts import get_font
+from .fonts import render_text
+from .surfaces import blit_sequence
+from .surfaces import make_surface
+from .surfaces import COLORKEY
+from .grid import GridOccupancy
+from .grid import GridPacker
+from .dock import Dock
+from .input_state import InputState
+from .manager import WindowManager
+from .manager import merge_rects
+from .events import Event
+from .events import to_event
 random.seed()
 
 
-_windows = []
-_window_event_export = []
-_highest_layer_number = 0
-_minimize_positions = []
-_top_border_button_cooldown = 0
-_elem_click_cooldown = 0
+# windows created without a manager belong to the default manager, which the module functions below use
+_default_manager = WindowManager()
 
 
 class WindowBase:
@@ -53,7 +64,40 @@ class WindowBase:
 
     To be implemented:
     Snap to other window
+
+    Attributes are kept in __slots__ instead of a __dict__, which makes windows smaller and attribute access faster.
+    Subclasses that don't define __slots__ themselves get a __dict__ back, so they can add any attributes they want.
+    Subclasses that do define __slots__ must list their new attributes there.
     """
+    __slots__ = (
+        "manager",
+        # position, size and surfaces
+        "pos", "old_pos", "size", "maximized_size", "minimized_size", "rect", "rect_backup", "target_surface",
+        "surface", "button_size", "border_rect", "minimize_button_rect", "close_button_rect",
+        # title
+        "window_title", "original_window_title", "window_title_font", "window_title_surface", "window_title_changed",
+        # depth, see zorder.py
+        "layer",
+        # flags
+        "is_focused", "is_dragged", "is_locked", "can_be_minimized", "can_be_closed", "can_be_dragged", "is_minimized",
+        "is_visible", "transparent", "init", "is_transient", "is_destroyed", "is_occluded",
+        # mouse flags
+        "m_border_rect", "m_minimize_button", "m_close_button", "m_window_rect",
+        # colors
+        "window_border_color", "window_background_color", "window_background_color_mouse_over",
+        "top_border_background_color_mouse_over", "top_border_background_color", "top_border_button_color",
+        "top_border_button_color_mouse_over", "top_border_top_layer_color",
+        # compositing and chrome cache
+        "is_dirty", "dirty_regions", "last_chrome_state", "chrome_cache", "chrome_cache_state",
+        # incremental composition
+        "is_incremental", "needs_recompose", "composed_background", "composed_elements", "changed_elements",
+        # grid
+        "set_grid_size", "grid_rect_size", "grid_size", "grid_start_position", "grid_margin", "auto_place_elements",
+        "grid_positions", "grid_packer",
+        # events and elements
+        "window_events", "elements", "element_backing", "element_layer", "element_layer_geometry",
+        "__weakref__",
+    )
 
     def __init__(self, pos: tuple,
                  size: tuple,
@@ -63,7 +107,21 @@ class WindowBase:
                  minimized: bool = False,
                  focused: bool = True,
                  transparent: bool = False,
-                 set_grid_size: tuple = None):
+                 set_grid_size: tuple = None,
+                 manager: WindowManager = None,
+                 transient: bool = False):
+        """
+        :param target_surface: surface to blit the window to, None for the manager's target surface
+        :param manager: the WindowManager the window belongs to, None for the default manager
+        :param transient: destroy the window when it is closed, e.g. for popups and dialogs.
+                          Once destroyed, nothing in pywindowframes references it, so it is garbage collected as soon
+                          as your own references to it are gone
+        """
+        self.manager = manager if manager is not None else _default_manager
+
+        if target_surface is None:
+            target_surface = self.manager.target_surface
+        assert target_surface is not None, "No target surface, and the window manager has no target surface either"
 
         # these 2 need to be mutable
         self.pos = list(pos)
@@ -84,34 +142,25 @@ class WindowBase:
         self.target_surface = target_surface
 
         # internal surface to draw and blit all window elements
-        self.surface = pg.Surface(self.size)
-        self.surface.fill((1, 1, 1))
-        self.surface.set_colorkey((1, 1, 1))
+        self.surface = make_surface(self.size, self.target_surface)
 
         # size of buttons in top menu bar
         self.button_size = 20
 
-        # init other window rects
-        self.border_rect = pg.Rect((0, 0), (self.rect.w,
-                                   self.button_size))
-        self.minimize_button_rect = pg.Rect((self.rect.w - (self.button_size * 2), 0),
-                                            (self.button_size, self.button_size))
-        self.close_button_rect = pg.Rect((self.rect.w - self.button_size, 0),
-                                         (self.button_size, self.button_size))
+        # init other window rects, the grid is placed below the top border
+        self.update_border_rects()
 
         # text vars
         self.window_title = window_title
         self.original_window_title = self.window_title
 
-        pg.font.init()
-        self.window_title_font = pg.font.Font(None, 32)
-        self.window_title_surface = self.window_title_font.render(self.window_title, False, (0, 0, 0), None)
+        self.window_title_font = get_font(None, 32)
+        self.window_title_surface = render_text(self.window_title)
         self.window_title_changed = True
 
         # layer vars (draw on top of other or draw behind other?
-        # make sure layer does not match any other window
-        self.layer = _highest_layer_number + 1
-        report_layer(self.layer)
+        # new windows are put on top of all other windows when added to the manager, see zorder.py
+        self.layer = None
 
         # flags
         self.is_focused = focused
@@ -143,6 +192,23 @@ class WindowBase:
         # first-run init flag
         self.init = False
 
+        # lifecycle flags, see destroy()
+        self.is_transient = transient
+        self.is_destroyed = False
+
+        # compositing flags
+        # is_occluded is set by the manager when the window is hidden behind other windows, see set_occlusion_culling()
+        self.is_occluded = False
+        # is_dirty is set whenever the window surface has changed since it was last blitted to target_surface
+        self.is_dirty = True
+        # the changed parts of the surface (window coordinates) if only parts of it changed, None for all of it
+        self.dirty_regions = None
+        self.last_chrome_state = None
+
+        # cached window chrome, see cached_chrome()
+        self.chrome_cache = None
+        self.chrome_cache_state = None
+
         # elements grid
         self.set_grid_size = set_grid_size
         self.grid_rect_size = (16, 16)
@@ -151,12 +217,16 @@ class WindowBase:
         self.grid_margin = 2
 
         self.auto_place_elements = True
-        # positions on grid
+        # positions on grid, see grid.py
         # access x=3, y=5 like a two-dimensional array
         # i.e. self.grid_positions[3][5]
         # it will return the element occupying that position
-        # format [x][y] = None or Obj(Element)
-        self.grid_positions = {}
+        # format [x][y] = False or Obj(Element)
+        # use self.grid_positions.is_free(x, y, w, h) to check a whole area at once
+        self.grid_positions = GridOccupancy(0, 0)
+
+        # places elements on the grid, made when first needed
+        self.grid_packer = None
 
         # internal event queue
         self.window_events = []
@@ -164,8 +234,21 @@ class WindowBase:
         # elements
         self.elements = []
 
-        # add to windows list
-        _windows.append(self)
+        # shared element layer, see set_element_backing()
+        self.element_backing = False
+        self.element_layer = None
+        self.element_layer_geometry = None
+
+        # incremental composition, see set_incremental_composition()
+        self.is_incremental = False
+        self.needs_recompose = True
+        self.composed_background = None
+        # element -> rect it was last blitted to, and the elements that changed since
+        self.composed_elements = {}
+        self.changed_elements = set()
+
+        # add to the manager's windows list and z-order
+        self.manager.add_window(self)
 
     """
     UPDATES
@@ -176,7 +259,10 @@ class WindowBase:
             self.snap_to_screen_edges()
 
         if self.is_visible:
-            self.custom_early_update()
+            if profiling.enabled:
+                profiling.call_hook(self, self.custom_early_update)
+            else:
+                self.custom_early_update()
 
     def before_drawing_update(self):
         self.custom_before_drawing_update()
@@ -189,9 +275,21 @@ class WindowBase:
             self.shorten_window_title()
             self.draw_minimized_skeleton()
 
-        self.add_text()
+        # an incrementally composed window keeps its surface, with the title and custom drawing on it, until it is
+        # composed from scratch again
+        if self.is_composing_fully():
+            self.add_text()
 
-        self.custom_drawing_update()
+            if profiling.enabled:
+                profiling.call_hook(self, self.custom_drawing_update)
+            else:
+                self.custom_drawing_update()
+
+        # the skeleton is redrawn every frame, but it only looks different when its state has changed
+        chrome_state = self.chrome_state()
+        if chrome_state != self.last_chrome_state:
+            self.last_chrome_state = chrome_state
+            self.mark_dirty()
 
     def elements_update_early(self):
         if self.is_visible and not self.is_minimized:
@@ -203,12 +301,22 @@ class WindowBase:
         # global elements_mouse_over_buttons(window) is called after this method and before elements_update_late
 
     def elements_update_late(self):
-        # update flags, colors et c
+        # elements completely outside of the window are updated, but not drawn
+        w, h = self.surface.get_size()
         for e in self.elements:
-            e.update()
+            x, y = e.pos
+            e.is_culled = not (x < w and y < h and x + e.size[0] > 0 and y + e.size[1] > 0)
+
+        # update flags, colors et c
+        if profiling.enabled:
+            profiling.update_elements(self.elements)
+        else:
+            for e in self.elements:
+                e.update()
 
-        # blit
-        self.blit_elements()
+        # blit, unless the window is hidden behind other windows
+        if not self.is_occluded:
+            self.blit_elements()
 
     def late_update(self):
         self.handle_window_events()
@@ -219,7 +327,10 @@ class WindowBase:
             self.debug_grid()
             self.init = True
 
-        self.custom_late_update()
+        if profiling.enabled:
+            profiling.call_hook(self, self.custom_late_update)
+        else:
+            self.custom_late_update()
 
     """
     CUSTOM UPDATES
@@ -231,6 +342,12 @@ class WindowBase:
         pass
 
     def custom_drawing_update(self):
+        """
+        If you draw anything custom on the window surface here, call self.mark_dirty() when it changes,
+        otherwise it will not be recomposited in "dirty" compositing mode.
+        With incremental composition this is only called when the window is composed from scratch, which
+        self.mark_dirty() makes happen next frame
+        """
         pass
 
     def custom_elements_update_early(self):
@@ -251,11 +368,9 @@ class WindowBase:
     GRID METHODS
     """
     def debug_grid(self):
-        #print(self.try_to_occupy_grid_area((0, 0), (100, 100), "TEST_ELEM1"))
-        #print(self.try_to_occupy_grid_area((0, 0), (100, 100), "TEST_ELEM2"))
         ...
 
-    # @debdec
+    @traced("grid")
     def adapt_window_to_grid_size(self):
         self.grid_size = self.set_grid_size
 
@@ -297,43 +412,34 @@ class WindowBase:
         self.set_grid_size = None
 
         self.grid_start_position = self.grid_margin, self.border_rect.h + self.grid_margin
-        #print(f"[adapt_window_to_grid_size] grid_size {self.grid_size}, set grid size {self.set_grid_size}, size {self.size}")
-        #print(f"surface size {self.surface.get_size()}, self.rect {self.rect}")
+        if tracing.enabled:
+            tracing.trace("grid", "%s fitted to grid size %s, size %s", self.window_title, self.grid_size, self.size)
 
-    # @debdec
+    @traced("grid")
     def grid_size_init(self):
         # set size of window to match grid size
         # also checks so window isn't larger than target surface
         self.adapt_window_to_grid_size()
 
-        # make grid positions dict
-        for x in range(0, self.grid_size[0] + 1, 1):
-            self.grid_positions[x] = {}
-            for y in range(0, self.grid_size[1] + 1, 1):
-                self.grid_positions[x][y] = False
+        # grid positions are only remade if the grid size has changed
+        self.reset_grid(self.grid_size)
 
         self.set_grid_size = None
 
-    # @debdec
+    @traced("layout")
     def limit_window_size(self, size):
         sizex, sizey = size[0], size[1]
 
-        # print("limit input:", size)
-        # print("[limit_window_size] target surf size", self.target_surface.get_size())
-
         if sizex > self.target_surface.get_size()[0]:
             sizex = self.target_surface.get_size()[0] - 10
 
         if sizey > self.target_surface.get_size()[1]:
             sizey = self.target_surface.get_size()[1] - 10
 
-        #print("[limit_window_size] returning", sizex, sizey)
-
         return sizex, sizey
 
-    # @debdec
+    @traced("grid")
     def init_grid(self):
-        # print(f"[init_grid] {self.window_title}")
         # position grid inside the main window area
         if self.set_grid_size:
             return self.grid_size_init()
@@ -353,18 +459,15 @@ class WindowBase:
 
         self.grid_size = (int(x_rects), int(y_rects))
 
-        # create a dict mapping all grid slots organized x: {y1: True, y2: True, y3: True ...}
-        # True is taken, False is available
-        for x in range(0, int(x_rects + 1), 1):
-            self.grid_positions[x] = {}
-            for y in range(0, int(y_rects + 1), 1):
-                self.grid_positions[x][y] = False
+        # grid positions are only remade if the grid size has changed
+        # nothing is allocated until an element is placed on the grid
+        self.reset_grid(self.grid_size)
 
-        # print("[init_grid]", x_rects, y_rects)
-        # print("[init_grid]", self.grid_positions)
-        # print(f"[init_grid] {self.window_title} created grid: {x_rects} x-rects, {y_rects} y-rects with size {grid_width}, {grid_height}")
+        if tracing.enabled:
+            tracing.trace("grid", "%s created grid %s with size %s", self.window_title, self.grid_size,
+                          (grid_width, grid_height))
 
-    # @debdec
+    @traced("layout")
     def set_permanent_size(self, size: tuple):
         assert isinstance(size[0], (int, float)), "size needs to be int or float"
         assert isinstance(size[1], (int, float)), "size needs to be int or float"
@@ -389,44 +492,127 @@ class WindowBase:
         """
         pass
 
-    # TODO implement these great methods - will give auto placement of elements
     def try_to_occupy_grid_area(self, position, element_size, element):
+        """
+        Places element on the grid at position (window coordinates, like element.pos).
+        If that area is taken and auto_place_elements is True, the element is placed at the top-left-most free spot
+        at or after it (column by column) and moved there.
+        Returns True if the element was placed
+        """
         start_rects = self.calculate_start_grid_rect(position)
 
         # check if there is room where element is positioned right now
         if self.check_grid_availability(start_rects, element_size):
 
-            self.occupy_area(start_rects, element_size, element)
-            return True
+            return self.occupy_area(start_rects, element_size, element)
 
         else:
 
             if self.auto_place_elements:
-                return self.try_auto_place_elements(start_rects, element_size)
+                return self.try_auto_place_elements(start_rects, element_size, element)
 
             else:
                 return False
 
-    # TODO implement these great methods - will give auto placement of elements
-    def occupy_area(self, start_rects, element_size, element):
-        all_rects = self.return_all_grid_rects_needed(start_rects[0], start_rects[1], element_size)
+    def occupy_area(self, start_rects, element_size, element) -> bool:
+        needed_x, needed_y = self.calculate_amount_grid_rects_needed(element_size)
+        return self.get_grid_packer().place_at(element, start_rects[0], start_rects[1], needed_x, needed_y)
+
+    def try_auto_place_elements(self, start_rects, element_size, element) -> bool:
+        """
+        Finds the first free spot (column by column) at or after start_rects, places element there and moves it there
+        """
+        needed_x, needed_y = self.calculate_amount_grid_rects_needed(element_size)
+        position = self.get_grid_packer().place(element, needed_x, needed_y, start_rects)
+        if position is None:
+            return False
+
+        self.move_to_grid_position(element, position)
+        return True
 
-        for x in all_rects:
-            for y in all_rects[x]:
-                self.grid_positions[x][y] = element
+    def place_elements(self, elements, sort_by_size=False) -> dict:
+        """
+        Places all elements on the grid in one pass and moves them to their grid position.
+        Elements that are already on the grid are re-placed.
 
-    # TODO implement these great methods - will give auto placement of elements
-    def try_auto_place_elements(self, start_rects, element_size):
+        :param elements: elements to place, they are placed in this order
+        :param sort_by_size: place the largest elements first, which packs tighter
+        :return: {element: (grid x, grid y)}, the position is None for elements that did not fit
         """
-        Iterate column by column and try to find a suiting spot for the element
+        self.ensure_grid()
+        return self.pack_elements(elements, sort_by_size)
+
+    def pack_elements(self, elements, sort_by_size=False) -> dict:
+        packer = self.get_grid_packer()
+        sizes = {e: self.calculate_amount_grid_rects_needed(e.size) for e in elements}
+
+        order = list(sizes)
+        if sort_by_size:
+            order.sort(key=lambda e: sizes[e][0] * sizes[e][1], reverse=True)
+
+        # free all old positions first so they can be reused by any of the elements
+        for e in order:
+            packer.remove(e)
+
+        placement_map = {}
+        for e in order:
+            position = packer.place(e, *sizes[e])
+            placement_map[e] = position
+
+            if position is not None:
+                self.move_to_grid_position(e, position)
+
+        return placement_map
+
+    def move_to_grid_position(self, element, position):
+        """
+        Moves element to the window position of the grid rect it was placed at
+        """
+        element.grid_pos = position
+        element.pos = self.grid_rect_position(position)
+        element.has_changed = True
+
+    def remove_element_from_grid(self, element):
+        """
+        Frees the grid area taken by element so other elements can be placed there
         """
-        for x in range(start_rects[0],self.grid_size[0]):
-            for y in range(start_rects[1], self.grid_size[1]):
-                if self.check_grid_availability((x, y), element_size):
-                    self.occupy_area((x, y), element_size, ("TEST ELEMENT TRY AUTO PLACE"))
-                    return True
+        if self.grid_packer:
+            self.grid_packer.remove(element)
 
-        return False
+    def get_grid_packer(self) -> GridPacker:
+        if self.grid_packer is None:
+            self.grid_packer = GridPacker(self.grid_positions)
+        return self.grid_packer
+
+    def ensure_grid(self):
+        """
+        Makes sure the grid exists, it is normally created during the first update
+        """
+        if not self.init:
+            self.init_grid()
+            self.init = True
+
+    def reset_grid(self, grid_size):
+        """
+        Remakes the grid positions if the grid size has changed.
+        Elements that were placed on the old grid are placed again on the new one
+        """
+        if self.grid_positions.size == tuple(grid_size):
+            return
+
+        old_packer = self.grid_packer
+        self.grid_positions.resize(*grid_size)
+        self.grid_packer = None
+
+        if old_packer and old_packer.placements:
+            self.pack_elements(list(old_packer.placements))
+
+    def grid_rect_position(self, grid_rect) -> tuple:
+        """
+        Takes in (x, y) grid rect number, returns its position in pixels (window coordinates)
+        """
+        return (int(self.grid_start_position[0] + grid_rect[0] * self.grid_rect_size[0]),
+                int(self.grid_start_position[1] + grid_rect[1] * self.grid_rect_size[1]))
 
     def return_all_grid_rects_needed(self, start_x_rect, start_y_rect, element_size):
         """
@@ -458,28 +644,24 @@ class WindowBase:
         # calculate rects needed (x, y)
         amount_rects_needed = self.calculate_amount_grid_rects_needed(element_size)
 
-        # check all grid rects that will be occupied
-        try:
-            for x in range(start_rects[0], start_rects[0] + amount_rects_needed[0]):
-                for y in range(start_rects[1], start_rects[1] + amount_rects_needed[1]):
-                    if self.grid_positions[x][y]:
-                        return False
-
-        except KeyError:
-            # this case is reached if the object is larger than the available grid
-            # print("[check_grid_availability] KeyError. Grid is not large enough for element. Returning False")
-            return False
-
-        return True
+        # O(1) no matter the size of the area
+        # also returns False if the element is larger than the available grid
+        return self.grid_positions.is_free(start_rects[0], start_rects[1],
+                                           amount_rects_needed[0], amount_rects_needed[1])
 
     def calculate_start_grid_rect(self, position):
         """
-        Takes in position in pixels, returns (x, y) grid rect number
+        Takes in position in pixels (window coordinates), returns (x, y) grid rect number
         Use this to get the start rect.
         """
         posx = position[0]
         posy = position[1]
 
+        # the grid starts inside the window margins
+        if self.grid_start_position:
+            posx = max(posx - self.grid_start_position[0], 0)
+            posy = max(posy - self.grid_start_position[1], 0)
+
         # remove the remainder and divide by grid size to get closest (floor) grid rect
         grid_x = (posx - (posx % self.grid_rect_size[0])) / self.grid_rect_size[0]
         grid_y = (posy - (posy % self.grid_rect_size[1])) / self.grid_rect_size[1]
@@ -490,14 +672,9 @@ class WindowBase:
         """
         Returns available grid area
         """
-        available_x = 0
-        available_y = 0
-
-        for x in self.grid_positions:
-            for y in self.grid_positions[x]:
-                if not self.grid_positions[x][y]:
-                    available_x += self.grid_rect_size[0]
-                    available_y += self.grid_rect_size[1]
+        free_rects = self.grid_positions.free_count()
+        available_x = free_rects * self.grid_rect_size[0]
+        available_y = free_rects * self.grid_rect_size[1]
 
         return int(available_x), int(available_y)
 
@@ -530,7 +707,6 @@ class WindowBase:
             gh += 1
 
         grid_needed = int(gw), int(gh)
-        # print(f"[grid_needed] {grid_needed}, {size}")
 
         return grid_needed
 
@@ -538,6 +714,103 @@ class WindowBase:
     DRAWING / BLITTING METHODS
     """
 
+    def mark_dirty(self):
+        """
+        Tells the compositor that the window surface has changed and must be re-blitted.
+        An incrementally composed window is composed from scratch next frame
+        """
+        self.is_dirty = True
+        self.dirty_regions = None
+        self.needs_recompose = True
+
+    def mark_region_dirty(self, rect: pg.Rect):
+        """
+        Tells the compositor that only rect (window coordinates) of the window surface has changed
+        """
+        if not self.is_dirty:
+            self.is_dirty = True
+            self.dirty_regions = [rect]
+        elif self.dirty_regions is not None:
+            self.dirty_regions.append(rect)
+
+    def mark_element_dirty(self, element):
+        """
+        Called by elements when they look different. With incremental composition only the element's rect is
+        redrawn, otherwise the whole window is
+        """
+        if self.is_incremental:
+            self.changed_elements.add(element)
+        else:
+            self.mark_dirty()
+
+    def chrome_state(self) -> tuple:
+        """
+        Returns everything that affects how the window skeleton (border, top border, buttons, title) looks
+        """
+        return (tuple(self.size),
+                self.is_minimized,
+                self.is_top_layer(),
+                self.m_border_rect,
+                self.m_minimize_button,
+                self.m_close_button,
+                self.m_window_rect,
+                self.window_title,
+                self.transparent,
+                self.window_border_color,
+                self.window_background_color,
+                self.window_background_color_mouse_over,
+                self.top_border_background_color_mouse_over,
+                self.top_border_background_color,
+                self.top_border_button_color,
+                self.top_border_button_color_mouse_over,
+                self.top_border_top_layer_color)
+
+    def idle_signature(self) -> tuple:
+        """
+        Returns everything that must stay the same for update() to skip a frame, see set_idle_skipping()
+        """
+        return (tuple(self.pos),
+                self.is_visible,
+                self.layer,
+                self.is_dirty,
+                bool(self.window_events),
+                self.chrome_state())
+
+    def is_opaque(self) -> bool:
+        """
+        True if the window surface has no transparent pixels, so windows below it don't show through where it is.
+        Override and return False if you draw transparent ((1, 1, 1) colorkey) pixels on the window yourself
+        """
+        if self.is_minimized:
+            return True
+
+        return not self.transparent and COLORKEY not in (self.window_background_color,
+                                                         self.window_background_color_mouse_over)
+
+    def elements_need_update(self) -> bool:
+        """
+        True if an element will change next frame on its own, e.g. a DynamicSurface that is due
+        """
+        return self.is_visible and not self.is_minimized and any(e.needs_update() for e in self.elements)
+
+    def cached_chrome(self, render_function) -> pg.Surface:
+        """
+        Returns a fresh copy of the window chrome to draw elements on.
+        The chrome is only re-rendered by render_function when chrome_state() has changed since it was cached
+        """
+        chrome_state = self.chrome_state()
+        if chrome_state != self.chrome_cache_state or self.chrome_cache is None:
+            self.chrome_cache = render_function()
+            self.chrome_cache_state = chrome_state
+            self.needs_recompose = True
+
+        # an incrementally composed window keeps drawing on the surface it has
+        if not self.is_composing_fully() and self.surface.get_size() == self.chrome_cache.get_size():
+            return self.surface
+
+        self.needs_recompose = True
+        return self.chrome_cache.copy()
+
     def draw_skeleton(self):
         # Do NOT change size directly. A lot of methods are relying on size == maximized size
         # always use set_permanent_size unless you know what you are doing
@@ -545,15 +818,18 @@ class WindowBase:
         if self.size != self.maximized_size:
             self.set_permanent_size(tuple(self.size))
 
-        # print("[draw_skeleton] self.size:", self.size)
-        self.surface = pg.Surface(tuple(self.size))
-        self.surface.fill((1, 1, 1))
-        self.surface.set_colorkey((1, 1, 1))
-
         # make sure rect is of correct size
         self.rect = pg.Rect((0, 0), tuple(self.size))
 
-        # create rects
+        self.update_border_rects()
+
+        self.surface = self.cached_chrome(self.render_skeleton)
+
+    def update_border_rects(self):
+        """
+        Makes the top border and button rects. Also called from __init__, so a grid made before the first update()
+        starts below the same top border as one made later
+        """
         self.border_rect = pg.Rect((0, 0),
                                    (self.rect.w, self.button_size + 10))
 
@@ -563,6 +839,12 @@ class WindowBase:
         self.close_button_rect = pg.Rect((self.rect.w - self.button_size - 5, 5),
                                          (self.button_size, self.button_size))
 
+    def render_skeleton(self) -> pg.Surface:
+        """
+        Renders the maximized window chrome. Only called by cached_chrome() when the chrome has changed
+        """
+        surface = make_surface(tuple(self.size), self.target_surface)
+
         # colors
         color = self.window_border_color
         top_color = self.window_border_color
@@ -582,43 +864,42 @@ class WindowBase:
         if self.m_close_button:
             close_color = self.top_border_button_color_mouse_over
 
-        if self.layer == _highest_layer_number:
+        if self.is_top_layer():
             top_fill_color = self.top_border_top_layer_color
 
         if self.m_window_rect:
             window_color = self.window_background_color_mouse_over
-            if self.layer != _highest_layer_number:
+            if not self.is_top_layer():
                 top_fill_color = self.top_border_background_color_mouse_over
 
         if self.transparent:
-            self.surface.set_colorkey((1, 1, 1))
             window_color = (1, 1, 1)
 
         # entire window
-        self.surface.fill((window_color), rect=self.rect)
-        pg.draw.rect(self.surface, color, self.rect, width=1, border_radius=5,
+        surface.fill((window_color), rect=self.rect)
+        pg.draw.rect(surface, color, self.rect, width=1, border_radius=5,
                      border_top_left_radius=0,
                      border_top_right_radius=0)
 
         # top border
-        self.surface.fill((top_fill_color), rect=self.border_rect)
-        pg.draw.rect(self.surface, top_color, self.border_rect, width=1,
+        surface.fill((top_fill_color), rect=self.border_rect)
+        pg.draw.rect(surface, top_color, self.border_rect, width=1,
                      border_radius=0)
 
         # button outlines
-        pg.draw.rect(self.surface, minimize_color, self.minimize_button_rect, width=1, border_radius=5)
-        pg.draw.rect(self.surface, close_color, self.close_button_rect, width=1, border_radius=5)
+        pg.draw.rect(surface, minimize_color, self.minimize_button_rect, width=1, border_radius=5)
+        pg.draw.rect(surface, close_color, self.close_button_rect, width=1, border_radius=5)
 
         # draw minimize "-" and close "X"
-        pg.draw.line(self.surface,
+        pg.draw.line(surface,
                      close_color,
                      (self.close_button_rect.topleft[0] + 2, self.close_button_rect.topleft[1] + 2),
                      (self.close_button_rect.bottomright[0] - 2, self.close_button_rect.bottomright[1] - 2))
-        pg.draw.line(self.surface,
+        pg.draw.line(surface,
                      close_color,
                      (self.close_button_rect.topright[0] - 2, self.close_button_rect.topright[1] + 2),
                      (self.close_button_rect.bottomleft[0] + 2, self.close_button_rect.bottomleft[1] - 2))
-        pg.draw.line(self.surface,
+        pg.draw.line(surface,
                      minimize_color,
                      (self.minimize_button_rect.topleft[0],
                      self.minimize_button_rect.topleft[1] + (self.minimize_button_rect.h / 2)),
@@ -626,21 +907,173 @@ class WindowBase:
                       self.minimize_button_rect.topleft[1] + (self.minimize_button_rect.h / 2))
                      )
 
+        return surface
+
     def blit_elements(self):
         self.adjust_element_positions()
 
+        if self.element_backing:
+            self.update_element_layer()
+
+        if not self.is_composing_fully():
+            self.blit_changed_elements()
+            return
+
+        if self.is_incremental:
+            # what changed elements are restored from
+            self.composed_background = self.surface.copy()
+            self.composed_elements = {e: pg.Rect(e.pos, e.surface.get_size()) for e in self.elements}
+            self.changed_elements.clear()
+            self.needs_recompose = False
+
+        if self.element_backing:
+            # the elements backed by the layer don't overlap anything, so the order is kept
+            self.surface.blit(self.element_layer, (0, 0))
+            items = [(e.surface, e.pos) for e in self.elements if e.backing_rect is None]
+        else:
+            items = [(e.surface, e.pos) for e in self.elements]
+
+        # one blits() call instead of a blit() call per element
+        self.surface.blits(blit_sequence(items, self.surface.get_size()), doreturn=False)
+
+    """
+    INCREMENTAL COMPOSITION
+    """
+
+    def set_incremental_composition(self, enabled: bool = True):
+        """
+        Normally the window surface is composed from scratch every frame: chrome, title, custom drawing and then every
+        element. An incrementally composed window keeps its surface, and only redraws the rects of elements that
+        changed, moved or were removed, from a copy of the window without elements. Only those rects are re-blitted in
+        "dirty" compositing mode. A window with 200 buttons where one is hovered redraws one button, not 200.
+
+        The window is still composed from scratch when its chrome changes or mark_dirty() is called.
+        NOTE: custom_drawing_update() is only called when the window is composed from scratch, call mark_dirty() when
+        what it draws changes. Elements changed from outside update() need window.mark_element_dirty(element)
+        """
+        if enabled == self.is_incremental:
+            return
+
+        self.is_incremental = enabled
+        self.composed_background = None
+        self.composed_elements = {}
+        self.changed_elements = set()
+        self.needs_recompose = True
+
+    def is_composing_fully(self) -> bool:
+        """
+        True if the window surface is composed from scratch this frame
+        """
+        return not self.is_incremental or self.needs_recompose or self.is_minimized or self.composed_background is None
+
+    def blit_changed_elements(self):
+        """
+        Redraws the rects of the elements that changed, moved, resized or were removed since last frame
+        """
+        regions = []
+        rects = {}
         for e in self.elements:
-            self.surface.blit(e.surface, e.pos)
+            rect = pg.Rect(e.pos, e.surface.get_size())
+            rects[e] = rect
+
+            old_rect = self.composed_elements.get(e)
+            if old_rect != rect:
+                if old_rect is not None:
+                    regions.append(old_rect)
+                regions.append(rect)
+            elif e in self.changed_elements:
+                regions.append(rect)
+
+        # removed elements
+        if len(rects) != len(self.composed_elements) or any(e not in rects for e in self.composed_elements):
+            regions.extend(rect for e, rect in self.composed_elements.items() if e not in rects)
+
+        self.composed_elements = rects
+        self.changed_elements.clear()
+
+        surface_rect = self.surface.get_rect()
+        for region in merge_rects(regions):
+            region = region.clip(surface_rect)
+            if region.w and region.h:
+                self.redraw_region(region, rects)
+                self.mark_region_dirty(region)
+
+    def redraw_region(self, region: pg.Rect, rects: dict):
+        """
+        Restores region from the window without elements, and blits the parts of the elements overlapping it
+        """
+        self.surface.blit(self.composed_background, region, area=region)
+
+        if self.element_backing:
+            self.surface.blit(self.element_layer, region, area=region)
+            items = [(e.surface, e.pos) for e in self.elements
+                     if e.backing_rect is None and rects[e].colliderect(region)]
+        else:
+            items = [(e.surface, e.pos) for e in self.elements if rects[e].colliderect(region)]
+
+        if items:
+            self.surface.set_clip(region)
+            self.surface.blits(items, doreturn=False)
+            self.surface.set_clip(None)
+
+    def set_element_backing(self, shared: bool = True):
+        """
+        Normally every element has a surface of its own, which is copied to the window surface every frame.
+        With a shared backing, elements draw straight into subsurfaces of one window sized element layer, and only
+        the layer is copied to the window surface. This saves a lot of blits for windows with many elements.
+        Elements that overlap another element or stick out of the window keep a surface of their own.
+
+        Element subsurfaces are only remade when the window size or the position or size of an element changes.
+        NOTE: Never replace element.surface of a backed element, draw on it instead
+        """
+        if shared == self.element_backing:
+            return
+
+        self.element_backing = shared
+        if not shared:
+            for e in self.elements:
+                if e.backing_rect is not None:
+                    e.surface = e.surface.copy()
+                    e.backing_rect = None
+            self.element_layer = None
+
+        self.element_layer_geometry = None
+
+    def update_element_layer(self):
+        """
+        Remakes the element layer and the element subsurfaces if the window or any element has been resized or moved
+        """
+        layer_size = self.surface.get_size()
+        geometry = layer_size, [(e, tuple(e.pos), tuple(e.size)) for e in self.elements]
+        if geometry == self.element_layer_geometry:
+            return
+        self.element_layer_geometry = geometry
+
+        # keep what the elements have drawn so far
+        contents = [e.surface.copy() for e in self.elements]
+
+        if self.element_layer is None or self.element_layer.get_size() != layer_size:
+            self.element_layer = make_surface(layer_size, self.target_surface)
+        self.element_layer.fill((1, 1, 1))
+
+        layer_rect = self.element_layer.get_rect()
+        rects = [pg.Rect(e.pos, e.size) for e in self.elements]
+
+        for i, e in enumerate(self.elements):
+            rect = rects[i]
+            overlaps = rect.collidelistall(rects)
+            if layer_rect.contains(rect) and overlaps == [i]:
+                e.backing_rect = rect
+                e.surface = self.element_layer.subsurface(rect)
+                e.surface.blit(contents[i], (0, 0))
+            else:
+                e.backing_rect = None
+                e.surface = contents[i]
 
     def draw_minimized_skeleton(self):
         # make rect size = top border rect size
         # also make the surface this size
         # text then doesn't need to be changed, because it will not fit if it is too long
-        # print("[draw_minimized_skeleton]")
-        self.surface = pg.Surface(self.minimized_size)
-        self.surface.fill((1, 1, 1))
-        self.surface.set_colorkey((1, 1, 1))
-
         self.rect = pg.Rect((0, 0), self.minimized_size)
 
         self.border_rect = pg.Rect((0, 0),
@@ -649,14 +1082,19 @@ class WindowBase:
         self.minimize_button_rect = pg.Rect((self.rect.w - self.button_size - 5, 5),
                                             (self.button_size, self.button_size))
 
+        self.surface = self.cached_chrome(self.render_minimized_skeleton)
+
+    def render_minimized_skeleton(self) -> pg.Surface:
+        """
+        Renders the minimized window chrome. Only called by cached_chrome() when the chrome has changed
+        """
         color = self.window_border_color
         top_color = self.window_border_color
         top_fill_color = self.top_border_background_color
         minimize_color = self.top_border_button_color
-        close_color = self.top_border_button_color
 
-        # remake surface (to adjust its size which is now smaller)
-        self.surface = pg.Surface(self.minimized_size)
+        # the minimized window covers its whole rect, no colorkey needed
+        surface = make_surface(self.minimized_size, self.target_surface, colorkey=None)
 
         if self.m_border_rect:
             top_color = (255, 0, 0)
@@ -665,29 +1103,25 @@ class WindowBase:
         if self.m_minimize_button:
             minimize_color = self.top_border_button_color_mouse_over
 
-        if self.m_close_button:
-            close_color = self.top_border_button_color_mouse_over
-
-        if self.layer == _highest_layer_number:
+        if self.is_top_layer():
             top_fill_color = self.top_border_top_layer_color
 
         # entire window
-        self.surface.fill((255, 255, 255), rect=self.rect)
-        pg.draw.rect(self.surface, color, self.rect, width=1, border_radius=5,
+        surface.fill((255, 255, 255), rect=self.rect)
+        pg.draw.rect(surface, color, self.rect, width=1, border_radius=5,
                      border_top_left_radius=0,
                      border_top_right_radius=0)
 
         # top border
-        self.surface.fill((top_fill_color), rect=self.border_rect)
-        pg.draw.rect(self.surface, top_color, self.border_rect, width=1,
+        surface.fill((top_fill_color), rect=self.border_rect)
+        pg.draw.rect(surface, top_color, self.border_rect, width=1,
                      border_radius=0)
 
         # button outlines
-        pg.draw.rect(self.surface, minimize_color, self.minimize_button_rect, width=1, border_radius=5)
-        # pg.draw.rect(self.surface, close_color, self.close_button_rect, width=1, border_radius=5)
+        pg.draw.rect(surface, minimize_color, self.minimize_button_rect, width=1, border_radius=5)
 
         # draw minimize "-"
-        pg.draw.line(self.surface,
+        pg.draw.line(surface,
                      minimize_color,
                      (self.minimize_button_rect.topleft[0],
                       self.minimize_button_rect.topleft[1] + (self.minimize_button_rect.h / 2)),
@@ -695,15 +1129,15 @@ class WindowBase:
                       self.minimize_button_rect.topleft[1] + (self.minimize_button_rect.h / 2))
                      )
 
-    #@debdec
+        return surface
+
+    @traced("draw")
     def update_surface(self):
-        #print(f"[update_surface] {self.window_title}")
         old_surf_size = self.surface.get_size()
 
         # update surface
-        self.surface = pg.Surface(self.size)
-        self.surface.fill((1, 1, 1))
-        self.surface.set_colorkey((1, 1, 1))
+        self.surface = make_surface(self.size, self.target_surface)
+        self.needs_recompose = True
 
         if old_surf_size != self.surface.get_size():
             # need to update grid if surface size has changed
@@ -736,8 +1170,9 @@ class WindowBase:
 
     def window_dragging(self):
         if self.can_be_dragged:
-            mx, my = pg.mouse.get_rel()
-            # print(f"window dragging, mx, my: {mx, my}")
+            mx, my = self.manager.input.rel
+            if tracing.enabled:
+                tracing.trace("input", "%s dragged by %s", self.window_title, (mx, my))
 
             self.pos[0] += mx
             self.pos[1] += my
@@ -752,7 +1187,6 @@ class WindowBase:
             if e.pos[0] < self.grid_margin:
                 e.pos = self.grid_margin, e.pos[1]
                 e.has_changed = True
-                # print(e.name, "moved to x==5")
 
             # right adjust
             elif e.pos[0] + e.size[0] > self.size[0] - e.size[0] - self.grid_margin:
@@ -779,16 +1213,16 @@ class WindowBase:
 
     def shorten_window_title(self):
         shortened_title = self.window_title[:14]
-        self.window_title = shortened_title
-        self.update_text()
+        if shortened_title != self.window_title:
+            self.window_title = shortened_title
+            self.update_text()
 
     def change_window_text(self, text):
         self.window_title = text
         self.window_title_changed = True
 
     def update_text(self):
-        self.window_title_font = pg.font.Font(None, 32)
-        self.window_title_surface = self.window_title_font.render(self.window_title, False, (0, 0, 0), None)
+        self.window_title_surface = render_text(self.window_title)
         self.window_title_changed = True
 
     def resize_to_window_title(self):
@@ -824,21 +1258,41 @@ class WindowBase:
     LAYERING / WINDOW FOCUS
     """
 
+    def is_top_layer(self) -> bool:
+        return self.manager.z_order.top is self
+
     def increase_layer(self):
-        self.layer += 1
+        """
+        Moves the window one step closer to the front
+        """
+        above = self.manager.z_order.above[self]
+        if above is not None:
+            self.manager.z_order.raise_above(self, above)
 
     def focus_window(self):
         """
         Focus window = make it drawn last = put it in front
-        All other windows retain their original layer
-        Elegant :)
+        All other windows retain their relative order
         """
-        global _highest_layer_number
-        if self.layer == _highest_layer_number:
-            pass
-        else:
-            self.layer = _highest_layer_number + 1
-            report_layer(self.layer)
+        self.manager.z_order.bring_to_front(self)
+
+    def send_to_back(self):
+        """
+        Make the window drawn first = put it behind all other windows
+        """
+        self.manager.z_order.send_to_back(self)
+
+    def raise_above(self, window):
+        """
+        Put the window directly in front of another window
+        """
+        self.manager.z_order.raise_above(self, window)
+
+    def lower_below(self, window):
+        """
+        Put the window directly behind another window
+        """
+        self.manager.z_order.lower_below(self, window)
 
     """
     OPENING / CLOSING WINDOW
@@ -848,9 +1302,46 @@ class WindowBase:
         if self.can_be_closed:
             self.is_visible = False
 
+            if self.is_transient:
+                self.destroy()
+
     def open(self):
         self.is_visible = True
 
+    def destroy(self):
+        """
+        Removes the window for good. It is taken out of its manager (updates, z-order, hit-testing, its dock slot and
+        its event handlers) and its surfaces, elements and grid are dropped. Don't use the window after this.
+        If called during update(), e.g. from a custom_* method or an event handler, the window is hidden right away
+        and removed at the end of the frame
+        """
+        self.manager.destroy_window(self)
+
+    def release_resources(self):
+        """
+        Called by the manager when the window is destroyed
+        """
+        self.is_destroyed = True
+        self.is_visible = False
+
+        self.surface = None
+        self.chrome_cache = None
+        self.chrome_cache_state = None
+        self.last_chrome_state = None
+        self.window_title_surface = None
+
+        for e in self.elements:
+            e.release_resources()
+        self.elements.clear()
+        self.element_layer = None
+        self.element_layer_geometry = None
+        self.composed_background = None
+        self.composed_elements = {}
+        self.changed_elements = set()
+        self.window_events.clear()
+        self.grid_positions = GridOccupancy(0, 0)
+        self.grid_packer = None
+
     """
     EVENTS
     """
@@ -864,11 +1355,10 @@ class WindowBase:
 
     def flush_window_events_to_external_event_queue(self):
         for event in self.window_events:
-            post_event((self, event))
-            self.window_events.remove(event)
+            self.manager.post_event(to_event(event, self))
+        self.window_events.clear()
 
     def handle_window_events(self):
-        # print("Events:", [s for s in self.window_events], "in window", self.window_title)
         ...
 
 
@@ -880,12 +1370,18 @@ class StaticWindow(WindowBase):
         * Remains open while StaticWindow.instance.is_constantly_expanded == True
         * Or just set it to is_constantly_expanded to keep it constantly expanded
     """
+    __slots__ = ("collapsed_size", "is_constantly_expanded", "constantly_expanded_button_color", "expand_button_rect",
+                 "background_surface", "is_collapsed")
+
     def __init__(self, pos, size, target_surface: pg.Surface, window_title: str, set_grid_size=None,
                  background_color=None,
                  background_surface=None,
                  collapsed_size=(30, 30),
-                 is_constantly_expanded=False):
-        super().__init__(pos, size, target_surface, window_title, set_grid_size=set_grid_size)
+                 is_constantly_expanded=False,
+                 manager=None,
+                 transient=False):
+        super().__init__(pos, size, target_surface, window_title, set_grid_size=set_grid_size, manager=manager,
+                         transient=transient)
 
         self.collapsed_size = collapsed_size
         self.is_constantly_expanded = is_constantly_expanded
@@ -904,45 +1400,59 @@ class StaticWindow(WindowBase):
         # unique flags
         self.is_collapsed = False
 
+    # override
+    def chrome_state(self) -> tuple:
+        return super().chrome_state() + (self.is_constantly_expanded,
+                                         self.background_surface,
+                                         self.collapsed_size)
+
     def change_expansion_state(self):
         if self.is_constantly_expanded:
             self.is_constantly_expanded = False
         elif not self.is_constantly_expanded:
             self.is_constantly_expanded = True
 
+    # override
+    def update_border_rects(self):
+        # no top border bar, the rects keep the size of the buttons
+        self.border_rect = pg.Rect((0, 0), (self.rect.w, self.button_size))
+        self.minimize_button_rect = pg.Rect((self.rect.w - (self.button_size * 2), 0),
+                                            (self.button_size, self.button_size))
+        self.close_button_rect = pg.Rect((self.rect.w - self.button_size, 0),
+                                         (self.button_size, self.button_size))
+
     # override
     def draw_skeleton(self):
-        if self.background_surface:
-            self.surface.blit(self.background_surface, (0, 0))
+        if self.is_constantly_expanded or self.m_window_rect:
+            self.size = self.maximized_size
+        else:
+            self.size = self.collapsed_size
+        self.update_rect()
 
-        if self.window_background_color:
-            self.surface.fill(self.window_background_color)
+        # only remake the surface (and grid) when collapsing/expanding
+        if tuple(self.surface.get_size()) != tuple(self.size):
+            self.update_surface()
 
-        if not self.is_constantly_expanded:
-            if self.m_window_rect:
-                self.size = self.maximized_size
-                self.update_rect()
-                self.update_surface()
+        self.surface = self.cached_chrome(self.render_skeleton)
 
-                pg.draw.rect(self.surface, self.window_border_color, self.rect, width=1)
+    # override
+    def render_skeleton(self) -> pg.Surface:
+        surface = make_surface(self.size, self.target_surface)
 
-            if not self.m_window_rect:
-                self.size = self.collapsed_size
-                self.update_rect()
-                self.update_surface()
+        # collapsed or mouse-expanded windows only show their border
+        if self.is_constantly_expanded:
+            surface.fill(self.window_background_color)
 
-                pg.draw.rect(self.surface, self.window_border_color, self.rect, width=1)
+        pg.draw.rect(surface, self.window_border_color, self.rect, width=1)
 
-        if self.is_constantly_expanded:
-            #print("is constantly expanded")
-            self.size = self.maximized_size
-            self.update_rect()
-            self.update_surface()
-            self.surface.fill(self.window_background_color)
+        return surface
 
-            pg.draw.rect(self.surface, self.window_border_color, self.rect, width=1)
+    # override
+    def is_opaque(self) -> bool:
+        # collapsed or mouse-expanded windows only show their border
+        return self.is_constantly_expanded and self.window_background_color != COLORKEY
 
-# override
+    # override
     def close(self):
         pass
 
@@ -955,331 +1465,143 @@ class StaticWindow(WindowBase):
         pass
 
 
-def update():
-    """
-    This method is the one to use to add methods that need updating inside window class
-    """
-    window_update()
-    window_selection()
-    back_to_front_blitting()
-
-
-def window_update():
-    for w in _windows:
-        index = 0
-        # print(index, w.window_title, w.size, w.surface.get_size())
-        index += 1
-
-        if w.is_visible:
-            w.early_update()
-            #print(index, w.window_title, w.size, w.surface.get_size())
-            index += 1
+"""
+DEFAULT WINDOW MANAGER
 
-        if w.is_visible:
-            w.drawing_update()
-            #print(index, w.window_title, w.size, w.surface.get_size())
-            index += 1
+The module functions work on the default window manager, or on the manager of the window passed to them.
+See WindowManager in manager.py for the documentation of each
+"""
 
-        if w.is_visible and not w.is_minimized:
-            w.elements_update_early()
-            elements_mouse_over_clicks(w)
-            w.elements_update_late()
 
-        if w.is_visible:
-            w.late_update()
+def get_default_manager() -> WindowManager:
+    return _default_manager
 
 
-def back_to_front_blitting():
-    """
-    Blit all window surfaces back to front
+def update(events: list = None) -> list[pg.Rect]:
     """
-    global _windows
-    # make a list of all windows ordered by layer
-    windows_copy = _windows.copy()
-    ordered_list_of_windows = []
-
-    # determine order of windows
-    while windows_copy:
-        for x in windows_copy:
-            if x.layer == min([s.layer for s in windows_copy]):
-                # this gives a front-to-back ordered list
-                ordered_list_of_windows.append(x)
-                windows_copy.remove(x)
-
-    while ordered_list_of_windows:
-        # pop the first item in the list to get back-to-front order
-
-        # only blit visible windows
-        window_to_blit = ordered_list_of_windows.pop(0)
-        if window_to_blit.is_visible:
-            window_to_blit.target_surface.blit(window_to_blit.surface, window_to_blit.pos)
+    Updates and blits all windows of the default manager, see WindowManager.update()
 
+    :param events: this frame's pygame events (pg.event.get()). If None, the mouse is polled instead, which can
+                   miss clicks shorter than a frame
 
-def window_selection():
-    # TODO most likely doesn't take into account if window is visible or not
-    # TODO implement
+    Returns the list of screen rects that were blitted to. In "dirty" compositing mode these are only the regions
+    that changed since last frame, and the list can be passed directly to pg.display.update()
+    """
+    return _default_manager.update(events)
 
-    top_layer_window = test_multiple_window_collision()
-    # print(f"Window layers: {[s.layer for s in _windows]}")
 
-    # this alternative happens when mouse is over 1 or more windows
-    # if they are overlapping each other,
-    # top_layer_window is the window amongst them with the highest layer number
-    if top_layer_window:
-        for w in _windows:
-            if w is not top_layer_window:
-                w.reset_mouse_over_flags()
+def window_update():
+    _default_manager.window_update()
 
-        buttons_mouse_over_internal(top_layer_window)
 
-    # this alternative happens if the mouse is not over any window that is in top level
-    if not top_layer_window:
-        for w in _windows:
-            w.reset_mouse_over_flags()
-            buttons_mouse_over_internal(w)
+def back_to_front_blitting() -> list[pg.Rect]:
+    return _default_manager.back_to_front_blitting()
 
 
-def test_multiple_window_collision():
+def set_compositing_mode(mode: str, background=None):
     """
-    Works
+    "full": every visible window is blitted to its target surface every frame (default).
+            Clear the screen yourself each frame and use pg.display.flip()
+    "dirty": only changed regions are re-blitted. Do NOT clear the screen each frame, instead pass the rects
+            returned by update() to pg.display.update(rects)
+
+    :param mode: "full" or "dirty"
+    :param background: surface or color used to restore what is below windows that moved, closed or minimized.
+                       If None, uncovered regions are left as they were
     """
-    # if multiple windows are stacked, only the one in the front will be mouse-overed/clicked
-    # determine which window has the highest layer
-
-    collided_windows = []
-    top_layer_window = None
-    for w in _windows:
-        if adjusted_mouse_rect_collision(w, w.rect):
-            collided_windows.append(w)
-
-    for w in collided_windows:
-        if w.is_visible:
-            if w.layer == max(w.layer for w in collided_windows):
-                top_layer_window = w
-                return top_layer_window
-
-    return None
-
-
-def adjusted_mouse_rect_collision(window, rect):
-    mx, my = pg.mouse.get_pos()
-
-    # convert to screen coordinates
-    scrx = mx - window.pos[0]
-    scry = my - window.pos[1]
-
-    # print("adjust mouse rect collision returning mouse click in window at pos", scrx, scry)
-
-    if rect.collidepoint(scrx, scry):
-        return True
+    _default_manager.set_compositing_mode(mode, background)
 
-    return False
 
-
-def buttons_mouse_over_internal(window):
+def invalidate_composite():
     """
-    Checks if mouse is over any window part and if the part is clicked
-    If a mouse click registers, posts an event that pywindowframes caught the click
+    Forces every window to be re-blitted next frame. Call this if you have drawn over the windows yourself
     """
+    _default_manager.invalidate_composite()
 
-    # reset flags
-    window.reset_mouse_over_flags()
-
-    # no click detection if window is not visible
-    if not window.is_visible:
-        return 0
-
-    if adjusted_mouse_rect_collision(window, window.border_rect):
-        window.m_border_rect = True
-
-        # minimize button clicked
-        if window.can_be_minimized and adjusted_mouse_rect_collision(window, window.minimize_button_rect):
-            window.m_minimize_button = True
-
-            if mouse0_cd():
-
-                if window.is_minimized:
-                    maximize(window)
-
-                elif not window.is_minimized:
-                    minimize(window)
-
-                # post event that pywindowframes caught the mouse click
-                post_event((window, "pywindowframes_clicked"))
-
-        # close button clicked
-        elif adjusted_mouse_rect_collision(window, window.close_button_rect):
 
-            window.m_close_button = True
+def window_selection():
+    _default_manager.window_selection()
 
-            if mouse0_cd():
 
-                window.close()
+def test_multiple_window_collision():
+    return _default_manager.test_multiple_window_collision()
 
-                # post event that pywindowframes caught the mouse click
-                post_event((window, "pywindowframes_clicked"))
 
-        # top border is clicked but no button in top border
-        else:
-            if pg.mouse.get_pressed(num_buttons=3)[0]:
-
-                window.is_dragged = True
-                window.focus_window()
+def buttons_mouse_over_internal(window):
+    window.manager.buttons_mouse_over_internal(window)
 
-                # post event that pywindowframes caught the mouse click
-                post_event((window, "pywindowframes_clicked"))
 
-        # reset mouse rel (because it returns mouse rel since it was last _called_
-        if not window.is_dragged:
-            pg.mouse.get_rel()
+def elements_mouse_over_clicks(window):
+    window.manager.elements_mouse_over_clicks(window)
 
-    # window rect collision
-    if adjusted_mouse_rect_collision(window, window.rect):
 
-        window.m_window_rect = True
+"""
+MAXIMIZE / MINIMIZE 
+"""
 
-        if not window.is_minimized:
-            if mouse0_cd():
-                # print("Window clicked")
-                window.focus_window()
 
-                # post event that pywindowframes caught the mouse click
-                post_event((window, "pywindowframes_clicked"))
+def maximize(window):
+    window.manager.maximize(window)
 
-    else:
-        window.m_window_rect = False
 
+def minimize(window):
+    """
+    Minimizes window
+    """
+    window.manager.minimize(window)
 
-# @debdec
-def elements_mouse_over_clicks(window):
-    # first find the top level window if several is collided
-    top_level_window = test_multiple_window_collision()
 
-    for e in window.elements:
-        # print(e.name, "found with rect", e.rect)
-        # print("mouse was clicked at pos", pg.mouse.get_pos())
-        if adjusted_mouse_rect_collision(window, e.rect):
+def get_dock(window) -> Dock:
+    return window.manager.get_dock(window)
 
-            # only allow clicking on the top level window if several windows are stacked
-            if top_level_window:
-                if e.window == top_level_window:
-                    e.set_mouse_over()
-                    #print(f"Mouse over {e.name} in top level")
 
-                    if mouse0_cd(elem=True):
-                        # print("mouse clicked (top level)")
-                        e.on_click()
+def get_minimize_position(window) -> list[int, int]:
+    return window.manager.get_minimize_position(window)
 
-                        # post event that pywindowframes caught the mouse click
-                        post_event((window, "pywindowframes_clicked"))
 
-            # if windows are not stacked, allow mouse over and clicking as usual
-            else:
-                e.set_mouse_over()
-                print(f"Mouse over {e.name} in no top level (no overlapping windows at mouse pos)")
+def release_minimize_position(window):
+    window.manager.release_minimize_position(window)
 
-                if mouse0_cd(elem=True):
-                    # print("mouse clicked (no window stacking)")
-                    e.on_click()
 
-                    # post event that pywindowframes caught the mouse click
-                    post_event((window, "pywindowframes_clicked"))
+def open_or_close_window(window):
+    window.manager.open_or_close_window(window)
 
 
 """
-LAYER CONTROL
+IDLE FRAMES
 """
 
 
-def report_layer(layer: int):
+def set_idle_skipping(enabled: bool = True):
     """
-    makes sure new windows always get assigned the highest layer
-    :param layer:
-    :return:
+    Skip frames where nothing can have changed, see WindowManager.set_idle_skipping()
     """
-    global _highest_layer_number
-
-    if layer > _highest_layer_number:
-        _highest_layer_number = layer
-
-
-"""
-MAXIMIZE / MINIMIZE 
-"""
-
-
-def maximize(window):
-    release_minimize_position(window.pos)
-    window.pos = window.old_pos
-    window.expand_window_title()
-    window.is_minimized = False
+    _default_manager.set_idle_skipping(enabled)
 
 
-def minimize(window):
+def set_occlusion_culling(enabled: bool = True):
     """
-    Minimizes window
+    Don't draw or composite windows hidden behind opaque windows, see WindowManager.set_occlusion_culling()
     """
-    global _minimize_positions
-    if window.can_be_minimized:
-        window.old_pos = window.pos
-
-        # get a valid position
-        window.pos = get_minimize_position(window)
-
-        # report this position to the list of positions
-        _minimize_positions.append(window.pos)
-
-        window.is_minimized = True
+    _default_manager.set_occlusion_culling(enabled)
 
 
-def get_minimize_position(window) -> list[int, int]:
+def is_idle() -> bool:
     """
-    Possible minimize positions are stored as a list of tuples.
-    First value is x-position and second value is if it is already used or not.
-    This function will iterate from beginning to end and return the first
-    available x-position for a window to be minimized to.
+    True if the last update() was skipped because nothing changed
     """
-    global _minimize_positions
-
-    # first determine first possible position
-    posx = 0
-    posy = window.target_surface.get_size()[1] - window.minimized_size[1]
-
-    # if position is unavailable, modify it
-    while [posx, posy] in _minimize_positions:
-        # print("posx in _minimize_positions")
-        posx += window.minimized_size[0]
-        if posx + window.minimized_size[0] > window.target_surface.get_size()[0]:
-            # print("posx", posx, "larger than surface size", window.target_surface.get_size()[0])
-            posx = 0
-            posy -= window.minimized_size[1]
-    # print("[get_minimize_position] returning:", posx, posy)
-    return [posx, posy]
-
+    return _default_manager.is_idle()
 
-def release_minimize_position(position: tuple[int, int] or list[int, int]):
-    global _minimize_positions
 
-    index = 0
-    for listpos in _minimize_positions:
-        if listpos == position:
-            _minimize_positions.remove(listpos)
-
-
-def open_or_close_window(window):
-    for w in _windows:
-        if w == window:
+def suggest_tick_rate(active: int = 60, idle: int = 10, idle_after: int = 30) -> int:
+    """
+    Frame rate the main loop can run at, see WindowManager.suggest_tick_rate()
 
-            if w.is_visible and not w.is_minimized:
-                w.close()
+        clock.tick(pwf.suggest_tick_rate())
+    """
+    return _default_manager.suggest_tick_rate(active, idle, idle_after)
 
-            elif w.is_visible and w.is_minimized:
-                maximize(window)
 
-            elif not w.is_visible:
-                if w.is_minimized:
-                    maximize(window)
-                w.open()
 """
 MODULE INIT
 """
@@ -1294,55 +1616,77 @@ EVENT HANDLING
 """
 
 
-def post_event(event: tuple[object, str]):
+def post_event(event: Event | tuple[object, str]):
+    """
+    Post event to the event queue of the default manager
+    format: Event or (window_obj, event_string)
+    Handlers registered with on() are called first. If one of them returns True, the event is not queued.
+    Events already in the queue are ignored (see configure_event_queue)
+    """
+    _default_manager.post_event(event)
+
+
+def on(kind: str, handler, window=None, element=None):
     """
-    Post event to the event queue
-    format: (window_obj, event_string)
+    Registers handler to be called directly when a matching event is posted. Returns handler
+
+    :param kind: event kind (e.g. "was_clicked") or full event string (e.g. "buttonname-was_clicked")
+    :param handler: function taking the event. Return True from it to consume the event (it will not be queued)
+    :param window: only events from this window
+    :param element: only events from this element
+    """
+    manager = window.manager if window is not None else _default_manager
+    return manager.on(kind, handler, window, element)
+
+
+def off(kind: str, handler, window=None, element=None):
+    """
+    Unregisters a handler, use the same arguments as when calling on()
     """
-    if event not in _window_event_export:
-        _window_event_export.append(event)
+    manager = window.manager if window is not None else _default_manager
+    manager.off(kind, handler, window, element)
 
 
-def pop_event() -> tuple[object, str] or None:
+def pop_event() -> Event | None:
     """
     Returns event if one is in queue
     If queue is empty, returns None
     """
-    if _window_event_export:
-        event = _window_event_export.pop(0)
-        # print("popping event:", event)
-        return event
+    return _default_manager.pop_event()
 
-    else:
-        return None
+
+def drain_events() -> list[Event]:
+    """
+    Returns all events in the queue in the order they were posted, and empties the queue
+    """
+    return _default_manager.drain_events()
 
 
 def poll_queue() -> bool:
-    if _window_event_export:
-        return True
-    else:
-        return False
+    return _default_manager.poll_queue()
 
 
-# click cool down
+def configure_event_queue(capacity: int = None, overflow: str = "drop", dedupe=True):
+    """
+    :param capacity: max amount of queued events, None for unlimited (default)
+    :param overflow: when the queue is full, "drop" ignores new events, "overwrite" throws away the oldest event
+    :param dedupe: True ignores events already in the queue (default), False allows duplicates,
+                   or a set of event strings to only deduplicate those
+    """
+    _default_manager.configure_event_queue(capacity, overflow, dedupe)
+
+
+# click detection
 def mouse0_cd(elem=False):
     """
-    Call this to check if mouse button 0 (left) has been clicked
-    Only returns True if click is off cool down (to prevent click*frame rate amount of clicks in a single click)
+    Call this to check if mouse button 0 (left) has been clicked this frame, see WindowManager.mouse0_cd()
     :return bool:
     """
-    global _top_border_button_cooldown
-    global _elem_click_cooldown
+    return _default_manager.mouse0_cd(elem)
 
-    t = time()
-    if not elem:
-        if t > _top_border_button_cooldown and pg.mouse.get_pressed(num_buttons=3)[0]:
-            _top_border_button_cooldown = t + 0.5
-            return True
 
-    if elem:
-        if t > _elem_click_cooldown and pg.mouse.get_pressed(num_buttons=3)[0]:
-            _elem_click_cooldown = t + 0.5
-            return True
-
-    return False
+def get_input() -> InputState:
+    """
+    Returns this frame's mouse input snapshot of the default manager
+    """
+    return _default_manager.get_input()
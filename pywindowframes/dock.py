@@ -0,0 +1,77 @@
+"""
+Slots for minimized windows.
+
+Minimized windows stack up horizontally at the bottom of their target surface, and start a new row above when a row
+is full. Every slot has an index, counting left to right, bottom row first. Released slots go into a heap, so the
+lowest free slot is always handed out first, and taking or releasing a slot is O(log n).
+"""
+import heapq
+
+
+class Dock:
+    def __init__(self, surface_size: tuple, slot_size: tuple):
+        """
+        :param surface_size: size of the target surface the windows are minimized on
+        :param slot_size: size of a minimized window
+        """
+        self.slot_size = tuple(slot_size)
+        self.surface_size = None
+        self.columns = 1
+        self.resize(surface_size)
+
+        # slots below next_slot that have been released
+        self.free_slots = []
+        self.next_slot = 0
+
+        # window -> slot index
+        self.owners = {}
+
+    def __len__(self):
+        return len(self.owners)
+
+    def __contains__(self, window):
+        return window in self.owners
+
+    def resize(self, surface_size: tuple):
+        self.surface_size = tuple(surface_size)
+        self.columns = max(self.surface_size[0] // self.slot_size[0], 1)
+
+    def position(self, slot: int) -> list[int, int]:
+        column = slot % self.columns
+        row = slot // self.columns
+        return [column * self.slot_size[0], self.surface_size[1] - (row + 1) * self.slot_size[1]]
+
+    def acquire(self, window) -> list[int, int]:
+        """
+        Gives window the lowest free slot and returns its position
+        """
+        if window in self.owners:
+            return self.position(self.owners[window])
+
+        if self.free_slots:
+            slot = heapq.heappop(self.free_slots)
+        else:
+            slot = self.next_slot
+            self.next_slot += 1
+
+        self.owners[window] = slot
+        return self.position(slot)
+
+    def release(self, window):
+        slot = self.owners.pop(window, None)
+        if slot is None:
+            return
+
+        heapq.heappush(self.free_slots, slot)
+
+        # when the dock is empty, start over so the heap doesn't keep growing
+        if not self.owners:
+            self.free_slots.clear()
+            self.next_slot = 0
+
+    def reflow(self, surface_size: tuple) -> list:
+        """
+        Call when the target surface has been resized. Returns [(window, new position), ...] for all windows in the dock
+        """
+        self.resize(surface_size)
+        return [(window, self.position(slot)) for window, slot in self.owners.items()]
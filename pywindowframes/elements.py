@@ -1,8 +1,26 @@
 import pygame as pg
+from time import perf_counter
 from time import time
+from . import profiling
+from . import producers
+from . import tracing
+from .fonts import get_font
+from .fonts import render_text
+from .surfaces import make_surface
+from .events import Event
+from .events import WAS_CLICKED
+from .tracing import traced
 
 
 class BaseElement:
+    """
+    Attributes are kept in __slots__, see WindowBase. Subclasses without __slots__ can add any attributes they want
+    """
+    __slots__ = ("name", "grid_size", "grid_pos", "window", "window_size", "size", "rect", "pos", "pos_string",
+                 "surface", "border", "border_color", "border_mouse_over_color", "was_clicked_time",
+                 "mouse_over", "clicked", "dragged", "has_changed", "drawn_state", "backing_rect", "is_culled",
+                 "__weakref__")
+
     def __init__(self, name, window, pos=None, size=None, border=True, grid_pos=None, grid_size=None):
         """
         Using grid size and grid rects is a lot easier than using pos and size directly. Just set a window size
@@ -33,9 +51,11 @@ class BaseElement:
         self.pos_string = None
 
         # surface (transparent per default)
-        self.surface = pg.Surface(self.size)
-        self.surface.set_colorkey((1, 1, 1))
-        self.surface.fill((1, 1, 1))
+        self.surface = make_surface(self.size, self.window.target_surface)
+
+        # the rect of the window's shared element layer that self.surface is a subsurface of,
+        # None if the element has a surface of its own, see WindowBase.set_element_backing()
+        self.backing_rect = None
 
         # visual
         self.border = border
@@ -53,6 +73,13 @@ class BaseElement:
         # other flags
         self.has_changed = True
 
+        # the (mouse_over, clicked) state the surface was last drawn with
+        self.drawn_state = None
+
+        # set by the window when the element is completely outside of it. Culled elements are not drawn, and stay
+        # has_changed until they are drawn
+        self.is_culled = False
+
         # owner window list
         self.window.elements.append(self)
 
@@ -78,7 +105,6 @@ class BaseElement:
             assert isinstance(pos[1], (int, float)), "element.pos tuple/list must be (int or float, int or float)"
             x = pos[0]
             y = pos[1]
-        # print(f"{self.name}, internal pos returned {int(x), int(y)}")
         return int(x), int(y)
 
     def internal_size(self, size):
@@ -113,18 +139,17 @@ class BaseElement:
         """
         self.window = window
         self.window_size = self.window.size
-        print("Window instance changed, updating element", self.__class__)
+        if tracing.enabled:
+            tracing.trace("layout", "%s moved to window %s", self.name, getattr(window, "window_title", window))
 
     def set_mouse_over(self):
         """
         Call this for proper behavior, don't change attributes directly
         """
         self.mouse_over = True
-        self.has_changed = True
 
-    #@debdec
+    @traced("draw")
     def draw(self):
-        #  print("Trying to draw element", self.name)
         #  update rect
         self.rect = pg.Rect(self.pos, self.size)
 
@@ -132,19 +157,25 @@ class BaseElement:
         color = self.border_color
         if self.mouse_over:
             color = self.border_mouse_over_color
-            # print(f"{self.name} is mouse over and changing color to {self.border_mouse_over_color}")
 
         #  draw border if True
         if self.border:
-            self.surface = pg.Surface(self.size)
-            self.surface.set_colorkey((1, 1, 1))
+            # only make a new surface if the size has changed, a subsurface of the element layer is never replaced
+            if self.backing_rect is None and self.surface.get_size() != tuple(self.size):
+                self.surface = make_surface(self.size, self.window.target_surface)
             self.surface.fill((1, 1, 1))
             pg.draw.rect(self.surface, color, (0, 0, self.size[0], self.size[1]), border_radius=10, width=1)
 
     def post_event(self, event):
         self.window.add_window_event(event)
 
-    #@debdec
+    def post_element_event(self, kind: str, payload=None):
+        """
+        Posts an Event coming from this element. Its event string (event[1]) will be "elementname-kind"
+        """
+        self.window.add_window_event(Event(kind, self.window, self, payload))
+
+    @traced("draw")
     def remake_border(self, radius=0):
         color = self.border_color
         if self.mouse_over:
@@ -152,7 +183,7 @@ class BaseElement:
 
         pg.draw.rect(self.surface, color, ((0, 0), self.size), width=1, border_radius=radius)
 
-    # @debdec
+    @traced("input")
     def on_click(self):
         self.clicked = True
         self.was_clicked_time = time()
@@ -162,45 +193,65 @@ class BaseElement:
         # override if custom behavior is wanted
         pass
 
-    # @debdec
+    @traced("input")
     def reset_flags(self):
         """
         Call this first of all methods when iterating through elements
+        The element is only redrawn in update() if the flags end up different from when it was last drawn
         """
-        if self.clicked:
-            self.clicked = False
-            self.has_changed = True
-        if self.mouse_over:
-            self.mouse_over = False
-            self.has_changed = True
-
+        self.clicked = False
+        self.mouse_over = False
         self.dragged = False
 
-    #@debdec
+    @traced("draw")
     def update(self):
         self.rect = pg.Rect(self.pos, self.size)
 
-        if self.has_changed:
-            # print(f"{self.name} has changed = True")
+        state = self.mouse_over, self.clicked
+        if state != self.drawn_state:
+            self.drawn_state = state
+            self.has_changed = True
+
+        if self.has_changed and not self.is_culled:
             self.draw()
             self.has_changed = False
-        self.custom_update()
+            self.window.mark_element_dirty(self)
+
+        if profiling.enabled:
+            profiling.call_hook(self, self.custom_update)
+        else:
+            self.custom_update()
 
     def custom_update(self):
         # override for custom behavior
         pass
 
+    def needs_update(self) -> bool:
+        """
+        True if the element will look different next frame even if the mouse doesn't move.
+        Override if custom_update() changes the element on its own, e.g. an animation
+        """
+        return self.has_changed and not self.is_culled
+
+    def release_resources(self):
+        """
+        Called when the window is destroyed. Override to let go of anything the element holds on to
+        """
+        pass
+
 
 class Button(BaseElement):
+    __slots__ = ("text", "text_color", "text_font", "text_surface", "text_surface_pos", "click_text_color",
+                 "text_surface_has_changed")
+
     def __init__(self, name, window, pos, size, text, border=True, grid_size=None, grid_pos=None):
         super().__init__(name, window, pos, size, border, grid_size, grid_pos)
 
         # button text
-        pg.font.init()
         self.text = text
         self.text_color = (0, 0, 0)
-        self.text_font = pg.font.Font(None, 32)
-        self.text_surface = self.text_font.render(self.text, False, self.text_color, None)
+        self.text_font = get_font(None, 32)
+        self.text_surface = render_text(self.text, color=self.text_color)
         self.text_surface_pos = (0, 0)
         self.click_text_color = (255, 0, 0)
         self.text_surface_has_changed = True
@@ -208,35 +259,35 @@ class Button(BaseElement):
         self.adjust_size_to_text()
 
     # override
-    # @debdec
     def custom_on_click(self):
-        print(f"{self.name} was clicked")
-        event = "-".join([self.name, "was_clicked"])
-        self.post_event(event)
+        if tracing.enabled:
+            tracing.trace("events", "%s was clicked", self.name)
+        self.post_element_event(WAS_CLICKED)
 
     def adjust_size_to_text(self):
         if self.size[0] < self.text_surface.get_size()[0]:
             original_y = self.size[1]
             self.size = self.text_surface.get_size()[0] + 5, original_y
 
-    #@debdec
+    @traced("draw")
     def click_text_color_change(self):
         color = self.text_color
 
         if self.clicked:
             color = self.click_text_color
 
-        self.text_font = pg.font.Font(None, 32)
-        self.text_surface = self.text_font.render(self.text, False, color, None)
-        self.text_surface_pos = (0, 0)
+        text_surface = render_text(self.text, color=color)
 
-        self.text_surface_has_changed = True
+        if text_surface is not self.text_surface:
+            self.text_surface = text_surface
+            self.text_surface_has_changed = True
+            self.window.mark_element_dirty(self)
 
     def center_text(self):
         self.text_surface_pos = self.size[0] / 2 - self.text_surface.get_size()[0] / 2,\
                                 self.size[1] / 2 - self.text_surface.get_size()[1] / 2
 
-    # @debdec
+    @traced("draw")
     def custom_update(self):
         self.click_text_color_change()
         if self.text_surface_has_changed:
@@ -249,13 +300,39 @@ class Button(BaseElement):
 class DynamicSurface(BaseElement):
     """
     Updates it's surface with an external surface on a specified interval
+
+    With execution="thread" or "process", surface_to_blit_function runs on a worker pool (see producers.py) instead of
+    on the render thread. The element keeps showing the last finished surface, and swaps in the new one on the first
+    update after the job is done. Each element has at most one job in flight, updates that come due while a job is
+    running are skipped.
+
+    Updates are only blitted when the content has changed, see update_surface()
     """
+    __slots__ = ("surface_to_blit_position", "surface_to_blit_function", "surface_update_interval", "last_update",
+                 "surface_version_function", "surface_version", "execution", "producer_timeout",
+                 "job", "job_started", "job_timed_out", "job_version",
+                 "producer_times", "producer_timeouts", "producer_skips", "producer_unchanged")
+
     def __init__(self, name, window, pos=None, size=None, border=True,
                  surface_to_blit_function=None,
                  surface_update_interval=0,
                  grid_pos=None,
-                 grid_size=None):
+                 grid_size=None,
+                 execution="sync",
+                 producer_timeout=None,
+                 surface_version_function=None):
+        """
+        :param surface_update_interval: seconds between updates, 0 for every frame
+        :param execution: "sync" calls surface_to_blit_function on the render thread, "thread" or "process" runs it on
+                          a worker pool. Producers run in a process must be picklable (defined at module level)
+        :param producer_timeout: seconds. The result of a job running longer than this is thrown away when it is done,
+                                 and the element shows the last surface until the next job finishes in time
+        :param surface_version_function: optional, cheap function returning a version token (a counter, a timestamp, a
+                                         hash of the data drawn et c). surface_to_blit_function is only called when
+                                         the token differs from the one of the surface shown
+        """
         super().__init__(name, window, pos, size, border, grid_pos, grid_size)
+        assert execution in producers.EXECUTIONS, f"execution must be one of {producers.EXECUTIONS}"
 
         # see update_surface for instructions
         self.surface_to_blit_position = 0, 0
@@ -263,13 +340,45 @@ class DynamicSurface(BaseElement):
         self.surface_update_interval = surface_update_interval
         self.last_update = 0
 
+        # version token of the surface shown
+        self.surface_version_function = surface_version_function
+        self.surface_version = None
+
+        self.execution = execution
+        self.producer_timeout = producer_timeout
+
+        # the job in flight, if any
+        self.job = None
+        self.job_started = 0
+        self.job_timed_out = False
+        self.job_version = None
+
+        # seconds spent in surface_to_blit_function, and the amount of thrown away and skipped jobs
+        self.producer_times = profiling.RollingHistogram(profiling.history)
+        self.producer_timeouts = 0
+        self.producer_skips = 0
+        self.producer_unchanged = 0
+
     def custom_update(self):
         self.check_interval()
 
     def check_interval(self):
-        if time() > self.last_update + self.surface_update_interval:
+        if self.job is not None:
+            self.poll_job()
+
+        if self.is_due():
             self.update_surface()
 
+    def is_due(self) -> bool:
+        # without a producer there is nothing to update, and nothing to keep the frame from being idle
+        if not self.surface_to_blit_function:
+            return False
+        return time() > self.last_update + self.surface_update_interval
+
+    def needs_update(self) -> bool:
+        # a job in flight has to be polled
+        return super().needs_update() or self.job is not None or self.is_due()
+
     # override
     def draw(self):
         ...
@@ -282,14 +391,102 @@ class DynamicSurface(BaseElement):
         When instancing this class, provide a reference (surface_to_blit_function)
         to at function complying with the following criteria:
         * No parameters
-        * Returns a pygame.Surface
+        * Returns a pygame.Surface, or pywindowframes.UNCHANGED (or None) if nothing has changed since last time
 
-        This surface will be updated each frame or at the interval specified
+        This surface will be updated each frame or at the interval specified.
+        Unchanged surfaces are not blitted, and don't make the window redraw
         """
-        surface_to_blit = pg.Surface((0, 0))
-        if self.surface_to_blit_function:
-            surface_to_blit = self.surface_to_blit_function()
-            self.resize_to_surface()
+        if not self.surface_to_blit_function:
+            return
+
+        self.last_update = time()
 
-            self.surface.blit(surface_to_blit, (0, 0))
-            self.remake_border()
+        version = None
+        if self.surface_version_function:
+            version = self.surface_version_function()
+            if version == self.surface_version:
+                self.producer_unchanged += 1
+                return
+
+        if self.execution != "sync":
+            self.start_job(version)
+            return
+
+        start = perf_counter()
+        surface_to_blit = self.surface_to_blit_function()
+        self.producer_times.add(perf_counter() - start)
+
+        self.show_surface(surface_to_blit, version)
+
+    def show_surface(self, surface_to_blit, version=None):
+        if surface_to_blit is None or surface_to_blit is producers.UNCHANGED:
+            self.producer_unchanged += 1
+            return
+
+        self.surface_version = version
+        self.resize_to_surface()
+
+        self.surface.blit(surface_to_blit, (0, 0))
+        self.remake_border()
+        self.window.mark_element_dirty(self)
+
+    """
+    JOBS
+    """
+
+    def start_job(self, version=None):
+        # never more than one job per element, a job that timed out still counts until it is done
+        if self.job is not None:
+            self.producer_skips += 1
+            return
+
+        self.job = producers.submit(self.execution, self.surface_to_blit_function)
+        self.job_started = perf_counter()
+        self.job_timed_out = False
+        self.job_version = version
+
+    def poll_job(self):
+        """
+        Swaps in the surface of a finished job. The surface is only blitted here, on the render thread, so the
+        element never shows a half drawn surface
+        """
+        job = self.job
+
+        if not job.done():
+            if (self.producer_timeout is not None and not self.job_timed_out
+                    and perf_counter() - self.job_started > self.producer_timeout):
+                self.job_timed_out = True
+                self.producer_timeouts += 1
+            return
+
+        self.job = None
+        if job.cancelled():
+            return
+
+        # raises whatever the producer raised, like a sync producer would
+        surface_to_blit, elapsed = producers.job_result(job)
+        self.producer_times.add(elapsed)
+
+        if not self.job_timed_out:
+            self.show_surface(surface_to_blit, self.job_version)
+
+    def cancel_job(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+
+    def producer_stats(self) -> dict:
+        """
+        RollingHistogram.summary() of the time spent producing surfaces, plus the amount of jobs thrown away because
+        they timed out, of updates skipped because a job was still running and of updates that were unchanged
+        """
+        stats = self.producer_times.summary()
+        stats["timeouts"] = self.producer_timeouts
+        stats["skipped"] = self.producer_skips
+        stats["unchanged"] = self.producer_unchanged
+        stats["in_flight"] = self.job is not None
+        return stats
+
+    # override
+    def release_resources(self):
+        self.cancel_job()
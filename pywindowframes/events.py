@@ -0,0 +1,222 @@
+"""
+Events, the module event queue and event handlers.
+
+Events are posted by windows and elements and handled by the host program, either by popping them from the queue
+in the order they were posted, or by registering handlers that are called directly when a matching event is posted.
+Posting, popping, checking for duplicates and finding the handlers of an event are all O(1).
+"""
+from collections import deque
+
+
+# event kinds posted by pywindowframes itself
+PYWINDOWFRAMES_CLICKED = "pywindowframes_clicked"
+WAS_CLICKED = "was_clicked"
+
+
+class Event:
+    """
+    kind: what happened, e.g. "was_clicked"
+    window: the window the event comes from
+    element: the element the event comes from, or None
+    payload: anything else the poster wants to pass along
+
+    For backwards compatibility an event also behaves like the old (window, "event_string") tuple, i.e. event[0] is
+    the window and event[1] is the event string. The event string of an element event is "elementname-kind"
+    """
+    __slots__ = ("kind", "window", "element", "payload")
+
+    def __init__(self, kind: str, window=None, element=None, payload=None):
+        self.kind = kind
+        self.window = window
+        self.element = element
+        self.payload = payload
+
+    @property
+    def string(self) -> str:
+        if self.element is not None:
+            return "-".join([self.element.name, self.kind])
+        return self.kind
+
+    def __getitem__(self, index):
+        return (self.window, self.string)[index]
+
+    def __iter__(self):
+        yield self.window
+        yield self.string
+
+    def __len__(self):
+        return 2
+
+    def __eq__(self, other):
+        if isinstance(other, Event):
+            return (self.kind == other.kind and self.window is other.window and self.element is other.element
+                    and self.payload == other.payload)
+        if isinstance(other, tuple):
+            return (self.window, self.string) == other
+        return NotImplemented
+
+    def __hash__(self):
+        # same hash as the equivalent tuple
+        return hash((self.window, self.string))
+
+    def __repr__(self):
+        return f"Event({self.kind!r}, window={self.window!r}, element={self.element!r}, payload={self.payload!r})"
+
+
+def to_event(event, window=None) -> Event:
+    """
+    Turns an (window, "event_string") tuple or a plain event string into an Event
+    """
+    if isinstance(event, Event):
+        if event.window is None:
+            event.window = window
+        return event
+
+    if isinstance(event, str):
+        return Event(event, window)
+
+    window, kind = event
+    return Event(kind, window)
+
+
+class EventQueue:
+    def __init__(self, capacity: int = None, overflow: str = "drop", dedupe=True):
+        """
+        :param capacity: max amount of queued events, None for unlimited
+        :param overflow: what to do when the queue is full.
+                         "drop" ignores the new event, "overwrite" throws away the oldest event to make room
+        :param dedupe: True to ignore events that are already in the queue, False to allow duplicates,
+                       or a set of event kinds/strings that are deduplicated
+        """
+        assert overflow in ("drop", "overwrite"), "overflow must be 'drop' or 'overwrite'"
+        assert capacity is None or capacity > 0, "capacity must be None or at least 1"
+
+        self.events = deque()
+        self.capacity = capacity
+        self.overflow = overflow
+        self.dedupe = dedupe
+
+        # deduplicated events currently in the queue
+        self.queued = set()
+
+        # amount of events dropped or overwritten because the queue was full
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.events)
+
+    def __bool__(self):
+        return bool(self.events)
+
+    def is_deduped(self, event) -> bool:
+        if self.dedupe is True:
+            return True
+        if not self.dedupe:
+            return False
+        return event.kind in self.dedupe or event.string in self.dedupe
+
+    def post(self, event) -> bool:
+        """
+        Returns True if the event was queued
+        """
+        deduped = self.is_deduped(event)
+        if deduped and event in self.queued:
+            return False
+
+        if self.capacity is not None and len(self.events) >= self.capacity:
+            self.dropped += 1
+            if self.overflow == "drop":
+                return False
+            self.queued.discard(self.events.popleft())
+
+        self.events.append(event)
+        if deduped:
+            self.queued.add(event)
+
+        return True
+
+    def pop(self):
+        """
+        Returns the oldest event, or None if the queue is empty
+        """
+        if not self.events:
+            return None
+
+        event = self.events.popleft()
+        self.queued.discard(event)
+        return event
+
+    def drain(self) -> list:
+        """
+        Returns all queued events, oldest first, and empties the queue
+        """
+        events = list(self.events)
+        self.clear()
+        return events
+
+    def clear(self):
+        self.events.clear()
+        self.queued.clear()
+
+
+class EventDispatcher:
+    """
+    Calls registered handlers when events are posted.
+    Handlers are indexed by (kind, window, element) where window and element may be None to match any, so finding
+    the handlers of an event is a handful of dict lookups no matter how many handlers there are.
+    """
+    def __init__(self):
+        # (kind, window, element) -> list of handlers
+        self.handlers = {}
+
+    def __bool__(self):
+        return bool(self.handlers)
+
+    def on(self, kind: str, handler, window=None, element=None):
+        """
+        :param kind: event kind ("was_clicked") or event string ("buttonname-was_clicked")
+        :param handler: function taking the event. If it returns True the event is consumed and not queued
+        :param window: only call handler for events from this window
+        :param element: only call handler for events from this element
+        """
+        self.handlers.setdefault((kind, window, element), []).append(handler)
+        return handler
+
+    def off(self, kind: str, handler, window=None, element=None):
+        key = kind, window, element
+        handlers = self.handlers.get(key)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+            if not handlers:
+                del self.handlers[key]
+
+    def remove_window(self, window):
+        """
+        Unregisters all handlers registered for window or for one of its elements
+        """
+        keys = [key for key in self.handlers
+                if key[1] is window or (key[2] is not None and getattr(key[2], "window", None) is window)]
+        for key in keys:
+            del self.handlers[key]
+
+    def dispatch(self, event: Event) -> bool:
+        """
+        Calls all handlers matching event, most specific first
+        Returns True if a handler consumed the event
+        """
+        keys = [(event.kind, event.window, event.element),
+                (event.kind, event.window, None),
+                (event.kind, None, event.element),
+                (event.kind, None, None)]
+        if event.element is not None:
+            keys.append((event.string, None, None))
+
+        consumed = False
+
+        # window and element may be None, which makes some of the keys the same
+        for key in dict.fromkeys(keys):
+            for handler in self.handlers.get(key, ()):
+                if handler(event):
+                    consumed = True
+
+        return consumed
@@ -0,0 +1,87 @@
+"""
+Shared fonts and rendered text.
+
+Loading a font from disk and rendering text are both slow, so windows and elements get their fonts through
+get_font() and their text surfaces through render_text() instead of doing it themselves.
+
+NOTE: Rendered text surfaces are shared between everyone asking for the same text. Never draw on them!
+"""
+from collections import OrderedDict
+import pygame as pg
+from .surfaces import prepare_for_blitting
+
+
+# (font, size) -> pg.font.Font
+_fonts = {}
+
+# (text, font, size, color, antialias, background) -> pg.Surface, least recently used first
+_text_cache = OrderedDict()
+_text_cache_size = 512
+
+
+def get_font(font: str = None, size: int = 32) -> pg.font.Font:
+    """
+    Returns the shared font, loading it the first time it is asked for
+
+    :param font: font file name, None for the pygame default font
+    :param size: font size
+    """
+    key = font, size
+
+    if key not in _fonts:
+        if not pg.font.get_init():
+            pg.font.init()
+        _fonts[key] = pg.font.Font(font, size)
+
+    return _fonts[key]
+
+
+def render_text(text: str,
+                font: str = None,
+                size: int = 32,
+                color: tuple = (0, 0, 0),
+                antialias: bool = False,
+                background: tuple = None) -> pg.Surface:
+    """
+    Returns the rendered text surface. Identical text is only rendered once as long as it stays in the cache
+
+    :param text: text to render
+    :param font: font file name, None for the pygame default font
+    :param size: font size
+    :param color: text color
+    :param antialias: bool, antialiased text
+    :param background: background color, None for transparent
+    """
+    key = text, font, size, tuple(color), antialias, tuple(background) if background else None
+
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        return surface
+
+    # text is blitted a lot and never changed, so it is converted to the display format once
+    surface = prepare_for_blitting(get_font(font, size).render(text, antialias, color, background))
+    _text_cache[key] = surface
+
+    # drop the least recently used text
+    if len(_text_cache) > _text_cache_size:
+        _text_cache.popitem(last=False)
+
+    return surface
+
+
+def set_text_cache_size(size: int):
+    """
+    Sets how many rendered text surfaces are kept (default 512)
+    """
+    global _text_cache_size
+
+    assert size > 0, "text cache size must be at least 1"
+    _text_cache_size = size
+
+    while len(_text_cache) > _text_cache_size:
+        _text_cache.popitem(last=False)
+
+
+def clear_text_cache():
+    _text_cache.clear()
@@ -0,0 +1,410 @@
+"""
+Window grid occupancy.
+
+Keeps track of which grid rects of a window are taken, and by which element.
+Cells are stored in a flat bytearray next to a summed-area table (the amount of taken cells above and to the left of
+every cell), which makes "is this rectangle free?" an O(1) question no matter how large the rectangle is.
+Nothing is allocated until the first cell is taken, so windows that never place elements on their grid stay cheap.
+"""
+from array import array
+
+
+class GridColumn:
+    """
+    Makes grid[x][y] work like it did when the grid was a dict of dicts
+    """
+    __slots__ = ("grid", "x")
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.grid.height:
+            raise KeyError(y)
+        return self.grid.owner(self.x, y)
+
+    def __contains__(self, y):
+        return 0 <= y < self.grid.height
+
+    def __iter__(self):
+        return iter(range(self.grid.height))
+
+
+class GridOccupancy:
+    def __init__(self, width: int, height: int):
+        """
+        :param width: amount of grid rects along x
+        :param height: amount of grid rects along y
+        """
+        self.width = width
+        self.height = height
+
+        # allocated on first occupy()
+        # cells[y * width + x] is 1 if taken
+        self.cells = None
+        # owners[y * width + x] is the element taking the cell
+        self.owners = None
+        # sums[y * (width + 1) + x] is the amount of taken cells with cell x < x and cell y < y
+        self.sums = None
+
+    @property
+    def size(self) -> tuple:
+        return self.width, self.height
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.width:
+            raise KeyError(x)
+        return GridColumn(self, x)
+
+    def __contains__(self, x):
+        return 0 <= x < self.width
+
+    def __iter__(self):
+        return iter(range(self.width))
+
+    def allocate(self):
+        cell_count = self.width * self.height
+        self.cells = bytearray(cell_count)
+        self.owners = [None] * cell_count
+        self.sums = array("l", bytes(array("l").itemsize * (self.width + 1) * (self.height + 1)))
+
+    def resize(self, width: int, height: int):
+        """
+        Changes the grid size. All cells are freed if the size is different
+        """
+        if (width, height) == self.size:
+            return
+
+        self.width = width
+        self.height = height
+        self.cells = None
+        self.owners = None
+        self.sums = None
+
+    """
+    QUERIES
+    """
+
+    def in_bounds(self, x, y, w, h) -> bool:
+        return x >= 0 and y >= 0 and w >= 0 and h >= 0 and x + w <= self.width and y + h <= self.height
+
+    def taken_count(self, x, y, w, h) -> int:
+        """
+        Amount of taken cells in the area, O(1)
+        """
+        if self.sums is None:
+            return 0
+
+        sums = self.sums
+        row = self.width + 1
+        x1 = x + w
+        y1 = y + h
+        return sums[y1 * row + x1] - sums[y * row + x1] - sums[y1 * row + x] + sums[y * row + x]
+
+    def is_free(self, x, y, w, h) -> bool:
+        """
+        True if the area is inside the grid and no cell in it is taken, O(1)
+        """
+        if not self.in_bounds(x, y, w, h):
+            return False
+
+        return self.taken_count(x, y, w, h) == 0
+
+    def owner(self, x, y):
+        """
+        Returns the element taking the cell, or False if it is free
+        """
+        if self.owners is None:
+            return False
+
+        owner = self.owners[y * self.width + x]
+        if owner is None:
+            return False
+        return owner
+
+    def free_count(self) -> int:
+        return self.width * self.height - self.taken_count(0, 0, self.width, self.height)
+
+    """
+    CHANGES
+    """
+
+    def occupy(self, x, y, w, h, owner=True):
+        """
+        Takes every cell in the area for owner. The area must be inside the grid
+        """
+        assert self.in_bounds(x, y, w, h), "area is outside of the grid"
+
+        if self.cells is None:
+            self.allocate()
+
+        self.set_area(x, y, w, h, owner)
+
+    def free(self, x, y, w, h):
+        """
+        Frees every cell in the area
+        """
+        if self.cells is None:
+            return
+
+        assert self.in_bounds(x, y, w, h), "area is outside of the grid"
+        self.set_area(x, y, w, h, None)
+
+    def free_owner(self, owner, x, y, w, h):
+        """
+        Frees the cells in the area that are taken by owner
+        """
+        if self.cells is None:
+            return
+
+        owned = [i for cy in range(y, y + h) for i in range(cy * self.width + x, cy * self.width + x + w)
+                 if self.owners[i] is owner]
+
+        if len(owned) == w * h:
+            self.set_area(x, y, w, h, None)
+            return
+
+        for i in owned:
+            self.cells[i] = 0
+            self.owners[i] = None
+        if owned:
+            self.rebuild_sums()
+
+    def set_area(self, x, y, w, h, owner):
+        taken = 0 if owner is None else 1
+        changed = 0
+
+        cells = self.cells
+        owners = self.owners
+        for cy in range(y, y + h):
+            start = cy * self.width + x
+            for i in range(start, start + w):
+                if cells[i] != taken:
+                    cells[i] = taken
+                    changed += 1
+                owners[i] = owner
+
+        if not changed:
+            return
+
+        if changed == w * h:
+            # every cell changed, the summed-area table can be updated for the whole area at once
+            self.add_to_sums(x, y, w, h, 1 if taken else -1)
+        else:
+            self.rebuild_sums()
+
+    def add_to_sums(self, x, y, w, h, delta):
+        """
+        Adds delta to every cell in the area in the summed-area table.
+        Only the part of the table below and to the right of the area changes
+        """
+        sums = self.sums
+        row = self.width + 1
+        x1 = x + w
+        y1 = y + h
+
+        for sy in range(y + 1, self.height + 1):
+            dy = delta * (min(sy, y1) - y)
+            start = sy * row
+            for sx in range(x + 1, x1):
+                sums[start + sx] += dy * (sx - x)
+            full = dy * w
+            for sx in range(x1, row):
+                sums[start + sx] += full
+
+    def rebuild_sums(self):
+        sums = self.sums
+        cells = self.cells
+        row = self.width + 1
+
+        for y in range(self.height):
+            running = 0
+            above = y * row
+            below = above + row
+            for x in range(self.width):
+                running += cells[y * self.width + x]
+                sums[below + x + 1] = sums[above + x + 1] + running
+
+
+class GridPacker:
+    """
+    Places element areas on a GridOccupancy using MaxRects packing.
+
+    free_rects is a list of free (x, y, w, h) areas. Placing an area splits every free area it overlaps into the
+    (up to 4) largest free areas around it, and areas that are fully inside another free area are dropped.
+    Finding a spot for an element therefore only looks at a short list of free areas instead of every grid rect.
+    As long as only placing is done, the list holds every largest free area, so if none of them fits there is no
+    room. Removed elements give their area back to the list without merging it with its neighbours, so after
+    removals the list is rebuilt from the grid the next time a spot is searched for.
+    """
+    def __init__(self, grid: GridOccupancy):
+        self.grid = grid
+
+        # element -> (x, y, w, h) in grid rects
+        self.placements = {}
+
+        self.free_rects = []
+        # False when free_rects may be missing larger free areas, see remove()
+        self.is_exact = True
+        self.removals_since_rebuild = 0
+        self.rebuild_free_rects()
+
+    def __contains__(self, element):
+        return element in self.placements
+
+    """
+    FREE AREAS
+    """
+
+    def rebuild_free_rects(self):
+        """
+        Remakes the free area list from the cells taken in the grid
+        """
+        self.free_rects = [(0, 0, self.grid.width, self.grid.height)] if self.grid.width and self.grid.height else []
+        self.is_exact = True
+        self.removals_since_rebuild = 0
+
+        if self.grid.cells is None:
+            return
+
+        # split by every run of taken cells on each row
+        width = self.grid.width
+        cells = self.grid.cells
+        for y in range(self.grid.height):
+            x = 0
+            while x < width:
+                if not cells[y * width + x]:
+                    x += 1
+                    continue
+                start = x
+                while x < width and cells[y * width + x]:
+                    x += 1
+                self.split_free_rects((start, y, x - start, 1))
+
+    def split_free_rects(self, used):
+        ux, uy, uw, uh = used
+        kept = []
+        new = []
+
+        for free in self.free_rects:
+            fx, fy, fw, fh = free
+            if ux >= fx + fw or ux + uw <= fx or uy >= fy + fh or uy + uh <= fy:
+                kept.append(free)
+                continue
+
+            # left, right, top and bottom of the used area
+            if ux > fx:
+                new.append((fx, fy, ux - fx, fh))
+            if ux + uw < fx + fw:
+                new.append((ux + uw, fy, fx + fw - ux - uw, fh))
+            if uy > fy:
+                new.append((fx, fy, fw, uy - fy))
+            if uy + uh < fy + fh:
+                new.append((fx, uy + uh, fw, fy + fh - uy - uh))
+
+        self.free_rects = kept + self.prune(new, kept)
+
+    @staticmethod
+    def contains(outer, inner) -> bool:
+        return (outer[0] <= inner[0] and outer[1] <= inner[1]
+                and inner[0] + inner[2] <= outer[0] + outer[2] and inner[1] + inner[3] <= outer[1] + outer[3])
+
+    def prune(self, new, kept) -> list:
+        """
+        Drops new areas that are inside another area. Kept areas were already not inside each other, so only the
+        new areas need to be compared to everything
+        """
+        pruned = []
+        for i, rect in enumerate(new):
+            if any(self.contains(other, rect) for other in kept):
+                continue
+            # of two identical new areas, keep the first
+            if any(self.contains(other, rect) and (other != rect or j < i) for j, other in enumerate(new) if j != i):
+                continue
+            pruned.append(rect)
+
+        # kept areas inside a new area are no longer needed either
+        kept[:] = [rect for rect in kept if not any(self.contains(other, rect) for other in pruned)]
+        return pruned
+
+    """
+    PLACING
+    """
+
+    def find_position(self, w, h, start=(0, 0)):
+        """
+        Returns the top-left most (column by column) free (x, y) where a w * h area fits, at or after start
+        """
+        if w * h > self.grid.free_count():
+            return None
+
+        if not self.is_exact:
+            # a freed area may join its neighbours into a spot further up or left than any area in the list
+            self.rebuild_free_rects()
+
+        sx, sy = start
+        best = None
+
+        for fx, fy, fw, fh in self.free_rects:
+            x = max(fx, sx)
+            y = max(fy, sy)
+            if x + w > fx + fw or y + h > fy + fh:
+                continue
+            if best is None or (x, y) < best:
+                best = x, y
+
+        if best is not None and not self.grid.is_free(best[0], best[1], w, h):
+            # the grid was changed without going through the packer
+            self.rebuild_free_rects()
+            return self.find_position(w, h, start)
+
+        return best
+
+    def place_at(self, element, x, y, w, h) -> bool:
+        """
+        Places element at (x, y) if the area is free
+        """
+        # an element being moved may overlap its own old area
+        old_placement = self.placements.get(element)
+        self.remove(element)
+
+        if not self.grid.is_free(x, y, w, h):
+            if old_placement is not None:
+                self.place_at(element, *old_placement)
+            return False
+
+        self.grid.occupy(x, y, w, h, element)
+        self.placements[element] = x, y, w, h
+        self.split_free_rects((x, y, w, h))
+        return True
+
+    def place(self, element, w, h, start=(0, 0)):
+        """
+        Places element wherever it fits. Returns (x, y) or None if there is no room
+        """
+        position = self.find_position(w, h, start)
+        if position is None:
+            return None
+
+        self.place_at(element, position[0], position[1], w, h)
+        return position
+
+    def remove(self, element):
+        """
+        Frees the area taken by element, if it is placed
+        """
+        placement = self.placements.pop(element, None)
+        if placement is None:
+            return
+
+        self.grid.free_owner(element, *placement)
+
+        # the freed area is not merged with its neighbours
+        self.free_rects.append(placement)
+        self.is_exact = False
+        self.removals_since_rebuild += 1
+
+        # rebuild once in a while so the list doesn't fill up with small freed areas
+        if self.removals_since_rebuild > max(len(self.placements), 16):
+            self.rebuild_free_rects()
@@ -0,0 +1,149 @@
+"""
+Mouse input snapshot, built once per frame.
+
+Everything in pywindowframes that needs the mouse reads it from the frame's InputState instead of asking pg.mouse.
+This way all windows and elements see the same position, the same drag delta and the same clicks, and a click is
+a button down transition, so it is registered exactly once no matter the frame rate.
+
+Feed it the frame's pygame events for the best result:
+
+    events = pg.event.get()
+    pwf.update(events)
+
+Without events, pg.mouse is polled once per frame instead. Clicks shorter than a frame may then be missed.
+"""
+import pygame as pg
+
+
+# pygame mouse buttons 1, 2, 3 -> left, middle, right
+_BUTTONS = 3
+
+# pg.mouse.get_rel() returns the motion since anyone last called it. Every InputState that polls adds it to this
+# running total and takes the part it hasn't seen yet, so with several managers polling each of them gets all of it
+_polled_rel = [0, 0]
+
+
+class InputState:
+    def __init__(self, offset: tuple = (0, 0)):
+        """
+        :param offset: subtracted from the mouse position, for windows on a surface that is blitted to this position
+                       on the screen
+        """
+        self.offset = tuple(offset)
+
+        self.pos = None
+        self.previous_pos = None
+        self.rel = (0, 0)
+
+        # held down right now
+        self.buttons = [False] * _BUTTONS
+
+        # went down/up during this frame
+        self.pressed = [False] * _BUTTONS
+        self.released = [False] * _BUTTONS
+
+        # mouse wheel (x, y) scrolled during this frame
+        self.wheel = (0, 0)
+
+        # who has already used this frame's click, see click()
+        self.click_consumers = set()
+
+        # _polled_rel when this snapshot last polled the mouse
+        self.polled_rel = tuple(_polled_rel)
+
+    def next_frame(self, events=None):
+        """
+        Builds the snapshot for a new frame
+
+        :param events: this frame's list of pygame events, or None to poll pg.mouse
+        """
+        self.pressed = [False] * _BUTTONS
+        self.released = [False] * _BUTTONS
+        self.click_consumers.clear()
+        self.previous_pos = self.pos
+
+        if events is None:
+            self.poll()
+        else:
+            self.read_events(events)
+
+    def poll(self):
+        buttons = list(pg.mouse.get_pressed(num_buttons=_BUTTONS))
+
+        for i in range(_BUTTONS):
+            self.pressed[i] = buttons[i] and not self.buttons[i]
+            self.released[i] = self.buttons[i] and not buttons[i]
+
+        self.buttons = buttons
+        self.pos = self.translate(pg.mouse.get_pos())
+        self.wheel = (0, 0)
+
+        relx, rely = pg.mouse.get_rel()
+        _polled_rel[0] += relx
+        _polled_rel[1] += rely
+        self.rel = _polled_rel[0] - self.polled_rel[0], _polled_rel[1] - self.polled_rel[1]
+        self.polled_rel = tuple(_polled_rel)
+
+    def read_events(self, events):
+        if self.pos is None:
+            self.pos = self.translate(pg.mouse.get_pos())
+
+        relx, rely = 0, 0
+        wheelx, wheely = 0, 0
+
+        for event in events:
+            if event.type == pg.MOUSEMOTION:
+                self.pos = self.translate(event.pos)
+                relx += event.rel[0]
+                rely += event.rel[1]
+
+            elif event.type == pg.MOUSEBUTTONDOWN and 1 <= event.button <= _BUTTONS:
+                self.pos = self.translate(event.pos)
+                self.pressed[event.button - 1] = True
+                self.buttons[event.button - 1] = True
+
+            elif event.type == pg.MOUSEBUTTONUP and 1 <= event.button <= _BUTTONS:
+                self.pos = self.translate(event.pos)
+                self.released[event.button - 1] = True
+                self.buttons[event.button - 1] = False
+
+            elif event.type == pg.MOUSEWHEEL:
+                wheelx += event.x
+                wheely += event.y
+
+        self.rel = relx, rely
+        self.wheel = wheelx, wheely
+
+        # motion polled by other managers meanwhile is in the events already
+        self.polled_rel = tuple(_polled_rel)
+
+    def translate(self, pos) -> tuple:
+        if self.offset == (0, 0):
+            return pos
+        return pos[0] - self.offset[0], pos[1] - self.offset[1]
+
+    def is_idle(self) -> bool:
+        """
+        True if the mouse did not move, scroll or press, hold or release a button this frame.
+        A held button is not idle since dragging a window reacts to it every frame
+        """
+        return (self.pos == self.previous_pos
+                and self.rel == (0, 0)
+                and self.wheel == (0, 0)
+                and not any(self.buttons)
+                and not any(self.pressed)
+                and not any(self.released))
+
+    def click(self, consumer, button: int = 0) -> bool:
+        """
+        Returns True if button went down this frame, but only the first time each consumer asks.
+        E.g. the window buttons and the elements are different consumers, so both can react to the same click
+
+        :param consumer: any hashable identifying who is asking
+        :param button: 0 left, 1 middle, 2 right
+        """
+        if not self.pressed[button] or (consumer, button) in self.click_consumers:
+            return False
+
+        self.click_consumers.add((consumer, button))
+        return True
@@ -0,0 +1,869 @@
+"""
+Window managers.
+
+A WindowManager owns everything shared between its windows: the window list, the z-order, the hit-test index, the
+docks for minimized windows, the mouse input snapshot, the compositing state and the event queue and handlers.
+Windows belong to exactly one manager, and managers know nothing about each other, so several of them can be
+used side by side, e.g. one for the HUD, one per split-screen view and one for an offscreen render target:
+
+    hud = pwf.WindowManager(screen)
+    view = pwf.WindowManager(view_surface, mouse_offset=view_pos)
+    pwf.WindowBase((10, 10), (200, 100), None, "Score", manager=hud)
+
+    # main loop
+    events = pg.event.get()
+    hud.update(events)
+    view.update(events)
+
+Windows created without a manager belong to the default manager, which is what the module functions
+(pywindowframes.update(), pywindowframes.pop_event() et c) use.
+"""
+import pygame as pg
+from . import profiling
+from . import tracing
+from .zorder import ZOrder
+from .spatial import SpatialGrid
+from .dock import Dock
+from .surfaces import blit_sequence
+from .input_state import InputState
+from .events import EventQueue
+from .events import EventDispatcher
+from .events import Event
+from .events import PYWINDOWFRAMES_CLICKED
+from .events import to_event
+
+
+class WindowManager:
+    def __init__(self, target_surface: pg.Surface = None, mouse_offset: tuple = (0, 0)):
+        """
+        :param target_surface: surface windows of this manager are blitted to if they are created without one
+        :param mouse_offset: screen position of the target surface, if it is not the screen itself.
+                             The mouse position is moved by it, so windows on an offscreen surface can be clicked
+        """
+        self.target_surface = target_surface
+
+        self.windows = []
+        self.event_queue = EventQueue()
+        self.event_handlers = EventDispatcher()
+        self.z_order = ZOrder()
+
+        # hit-testing
+        # screen rects of all visible windows, and the top window under the mouse this frame
+        self.hit_index = SpatialGrid()
+        self.top_window = None
+
+        # (target surface, minimized size) -> Dock with slots for minimized windows
+        self.docks = {}
+
+        # mouse input snapshot for the current frame, see input_state.py
+        self.input = InputState(mouse_offset)
+
+        # compositing
+        # "full" blits every visible window each frame, "dirty" only re-blits the screen regions that changed
+        self.compositing_mode = "full"
+        self.composite_background = None
+        self.composited_windows = {}
+        # (target surface, rect) of destroyed windows, to be restored by the next dirty compositing
+        self.uncovered_rects = []
+
+        # windows hidden behind opaque windows are not drawn or composited, see set_occlusion_culling()
+        self.occlusion_culling = False
+
+        # windows destroyed during update() are removed at the end of the frame, see destroy_window()
+        self.is_updating = False
+        self.windows_to_destroy = {}
+
+        # idle frames, see set_idle_skipping()
+        self.idle_skipping = False
+        # idle_signature() after the last frame that was fully updated, None if that frame changed anything
+        self.last_idle_signature = None
+        # amount of frames skipped in a row
+        self.idle_frames = 0
+
+    def __len__(self):
+        return len(self.windows)
+
+    def __contains__(self, window):
+        return window in self.windows
+
+    def add_window(self, window):
+        """
+        Called by the window itself when it is created. New windows are put on top of all other windows
+        """
+        window.layer = None
+        self.z_order.push(window)
+        self.windows.append(window)
+
+    def destroy_window(self, window):
+        """
+        Removes the window from the manager for good, see WindowBase.destroy().
+        During update() the window is hidden right away and removed at the end of the frame, so no update phase
+        has its window list changed while iterating it
+        """
+        if window.is_destroyed or window.manager is not self:
+            return
+
+        window.is_visible = False
+
+        if self.is_updating:
+            self.windows_to_destroy[window] = None
+            return
+
+        self.windows.remove(window)
+        self.remove_window_references(window)
+
+    def destroy_pending_windows(self):
+        if not self.windows_to_destroy:
+            return
+
+        windows_to_destroy = self.windows_to_destroy
+        self.windows_to_destroy = {}
+
+        self.windows = [w for w in self.windows if w not in windows_to_destroy]
+        for window in windows_to_destroy:
+            self.remove_window_references(window)
+
+    def remove_window_references(self, window):
+        """
+        Takes the window out of everything else the manager keeps, and drops its surfaces
+        """
+        self.z_order.remove(window)
+        self.hit_index.remove(window)
+        self.release_minimize_position(window)
+        self.event_handlers.remove_window(window)
+
+        composited = self.composited_windows.pop(window, None)
+        if composited:
+            self.uncovered_rects.append((window.target_surface, composited[0]))
+
+        if self.top_window is window:
+            self.top_window = None
+
+        window.release_resources()
+
+    """
+    UPDATES
+    """
+
+    def update(self, events: list = None) -> list[pg.Rect]:
+        """
+        This method is the one to use to add methods that need updating inside window class
+
+        :param events: this frame's pygame events (pg.event.get()). If None, the mouse is polled instead, which can
+                       miss clicks shorter than a frame
+
+        Returns the list of screen rects that were blitted to. In "dirty" compositing mode these are only the regions
+        that changed since last frame, and the list can be passed directly to pg.display.update()
+        """
+        self.is_updating = True
+
+        # does nothing unless profiling is enabled
+        timer = profiling.start_frame()
+
+        # read the mouse once, everything this frame uses the same snapshot
+        self.input.next_frame(events)
+
+        self.update_docks()
+        timer.lap("input")
+
+        if self.idle_skipping and self.is_idle_frame():
+            # nothing can look different from last frame, only blit the window surfaces again
+            self.idle_frames += 1
+            blitted_rects = self.back_to_front_blitting()
+            timer.lap("blitting")
+            timer.stop()
+            self.end_frame()
+            return blitted_rects
+
+        self.idle_frames = 0
+        signature_before = self.idle_signature() if self.idle_skipping else None
+
+        # resolve which window is under the mouse once, everyone this frame uses the same answer
+        self.update_hit_index()
+        self.top_window = self.test_multiple_window_collision()
+        timer.lap("hit_test")
+
+        self.update_occlusion()
+        timer.lap("occlusion")
+
+        self.window_update()
+        timer.lap("window_update")
+
+        self.window_selection()
+        timer.lap("window_selection")
+
+        # if nothing changed during this frame, the next frame will look the same unless something else changes
+        self.last_idle_signature = None
+        if self.idle_skipping and not any(w.is_dirty for w in self.windows):
+            signature_after = self.idle_signature()
+            if signature_after == signature_before:
+                self.last_idle_signature = signature_after
+
+        blitted_rects = self.back_to_front_blitting()
+        timer.lap("blitting")
+        timer.stop()
+        self.end_frame()
+
+        return blitted_rects
+
+    def end_frame(self):
+        self.is_updating = False
+        self.destroy_pending_windows()
+
+    def window_update(self):
+        if profiling.enabled:
+            self.profiled_window_update()
+            return
+
+        for w in self.windows:
+            if w.is_visible:
+                w.early_update()
+
+            if w.is_visible and not w.is_occluded:
+                w.drawing_update()
+
+            if w.is_visible and not w.is_minimized:
+                self.elements_update(w)
+
+            if w.is_visible:
+                w.late_update()
+
+    def elements_update(self, w):
+        w.elements_update_early()
+        self.elements_mouse_over_clicks(w)
+        w.elements_update_late()
+
+    def profiled_window_update(self):
+        """
+        Same as window_update(), with the time of each window phase recorded
+        """
+        for w in self.windows:
+            if w.is_visible:
+                profiling.time_window_phase(w, "early", w.early_update)
+
+            if w.is_visible and not w.is_occluded:
+                profiling.time_window_phase(w, "drawing", w.drawing_update)
+
+            if w.is_visible and not w.is_minimized:
+                profiling.time_window_phase(w, "elements", lambda: self.elements_update(w))
+
+            if w.is_visible:
+                profiling.time_window_phase(w, "late", w.late_update)
+
+    def back_to_front_blitting(self) -> list[pg.Rect]:
+        """
+        Blit all window surfaces back to front
+        Returns the screen rects blitted to
+        """
+        # the z-order is kept sorted back to front at all times
+        ordered_list_of_windows = list(self.z_order)
+
+        covered = self.covered_windows()
+        self.render_uncovered_windows(covered)
+
+        if self.compositing_mode == "dirty":
+            return self.dirty_rect_blitting(ordered_list_of_windows, covered)
+
+        # target surface -> [(window surface, pos), ...] back to front
+        blits = {}
+        for window_to_blit in ordered_list_of_windows:
+            # only blit visible windows
+            window_to_blit.is_dirty = False
+            window_to_blit.dirty_regions = None
+            if window_to_blit.is_visible and window_to_blit not in covered:
+                blits.setdefault(window_to_blit.target_surface, []).append((window_to_blit.surface, window_to_blit.pos))
+
+        blitted_rects = []
+        for target_surface, items in blits.items():
+            blitted_rects.extend(target_surface.blits(blit_sequence(items, target_surface.get_size())))
+
+        return blitted_rects
+
+    def dirty_rect_blitting(self, ordered_list_of_windows: list, covered: set = frozenset()) -> list[pg.Rect]:
+        """
+        Only re-blits the screen regions that changed since last frame.
+        A region is dirty if a window moved, resized, changed depth, was opened, closed or minimized, or if its surface
+        changed (window.is_dirty). Every visible window overlapping a dirty region is re-blitted clipped to that region,
+        back to front, so windows below a changed window are restored correctly.
+        """
+        dirty_rects = {}
+
+        # where destroyed windows were
+        for target_surface, rect in self.uncovered_rects:
+            dirty_rects.setdefault(target_surface, []).append(rect)
+        self.uncovered_rects.clear()
+
+        for w in ordered_list_of_windows:
+            old_rect, old_below = self.composited_windows.get(w, (None, None))
+            new_rect = None
+            if w.is_visible:
+                new_rect = pg.Rect(w.pos, w.surface.get_size())
+
+            # if the window below has changed, the window itself was moved in depth
+            below = self.z_order.below[w]
+
+            if old_rect != new_rect or old_below is not below or (new_rect and w.is_dirty and w.dirty_regions is None):
+                for rect in (old_rect, new_rect):
+                    if rect:
+                        dirty_rects.setdefault(w.target_surface, []).append(rect)
+            elif new_rect and w.is_dirty:
+                # only parts of the window changed, see WindowBase.set_incremental_composition()
+                dirty_rects.setdefault(w.target_surface, []).extend(
+                    region.move(new_rect.topleft).clip(new_rect) for region in w.dirty_regions)
+
+            if new_rect:
+                self.composited_windows[w] = new_rect, below
+            else:
+                self.composited_windows.pop(w, None)
+
+            w.is_dirty = False
+            w.dirty_regions = None
+
+        blitted_rects = []
+        for target_surface, rects in dirty_rects.items():
+            surface_rect = target_surface.get_rect()
+            old_clip = target_surface.get_clip()
+
+            for rect in merge_rects(rects):
+                rect = rect.clip(surface_rect)
+                if not rect.w or not rect.h:
+                    continue
+
+                # the clip of the previous rect must not cut off the background of this one
+                target_surface.set_clip(rect)
+
+                # restore what was below the windows
+                if isinstance(self.composite_background, pg.Surface):
+                    target_surface.blit(self.composite_background, rect, area=rect)
+                elif self.composite_background is not None:
+                    target_surface.fill(self.composite_background, rect)
+
+                target_surface.blits([(w.surface, w.pos) for w in ordered_list_of_windows
+                                      if w.is_visible and w.target_surface is target_surface and w not in covered
+                                      and rect.colliderect(self.composited_windows[w][0])], doreturn=False)
+
+                blitted_rects.append(rect)
+
+            target_surface.set_clip(old_clip)
+
+        return blitted_rects
+
+    def set_compositing_mode(self, mode: str, background=None):
+        """
+        "full": every visible window is blitted to its target surface every frame (default).
+                Clear the screen yourself each frame and use pg.display.flip()
+        "dirty": only changed regions are re-blitted. Do NOT clear the screen each frame, instead pass the rects
+                returned by update() to pg.display.update(rects)
+
+        :param mode: "full" or "dirty"
+        :param background: surface or color used to restore what is below windows that moved, closed or minimized.
+                           If None, uncovered regions are left as they were
+        """
+        assert mode in ("full", "dirty"), "compositing mode must be 'full' or 'dirty'"
+        self.compositing_mode = mode
+        self.composite_background = background
+        self.invalidate_composite()
+
+    def invalidate_composite(self):
+        """
+        Forces every window to be re-blitted next frame. Call this if you have drawn over the windows yourself
+        """
+        self.composited_windows.clear()
+        self.uncovered_rects.clear()
+
+    """
+    OCCLUSION
+    """
+
+    def set_occlusion_culling(self, enabled: bool = True):
+        """
+        When enabled, windows completely hidden behind opaque windows (see WindowBase.is_opaque()) are not drawn or
+        composited. Their window and element updates still run, so their state and events stay correct, and a window
+        is redrawn as soon as any part of it shows again.
+
+        NOTE: custom_drawing_update() is not called for hidden windows
+        """
+        self.occlusion_culling = enabled
+        if not enabled:
+            for w in self.windows:
+                w.is_occluded = False
+
+    def covered_windows(self) -> set:
+        """
+        Returns the visible windows that are completely hidden, either behind opaque windows above them or outside of
+        their target surface. Always empty when occlusion culling is disabled
+        """
+        covered = set()
+        if not self.occlusion_culling:
+            return covered
+
+        # a window that was maximized, minimized or resized since it was drawn only covers what both sizes cover
+        opaque_rects = {w: pg.Rect(w.pos, w.surface.get_size()).clip(w.pos, current_size(w))
+                        for w in self.windows if w.is_visible and w.is_opaque()}
+
+        # the candidates covering a window are found in the spatial index
+        self.update_hit_index()
+
+        for w in self.windows:
+            if not w.is_visible:
+                continue
+
+            # the surface is out of date, the window has to be drawn before it can be hidden
+            if tuple(current_size(w)) != w.surface.get_size():
+                continue
+
+            rect = pg.Rect(w.pos, w.surface.get_size()).clip(w.target_surface.get_rect())
+            if not rect.w or not rect.h:
+                covered.add(w)
+                continue
+
+            covers = [opaque_rects[other] for other in self.hit_index.in_rect(tuple(rect))
+                      if other in opaque_rects and other.layer > w.layer and other.target_surface is w.target_surface]
+            if covers and not subtract_rects(rect, covers):
+                covered.add(w)
+
+        return covered
+
+    def update_occlusion(self):
+        """
+        Marks the windows that are hidden at the start of the frame, their drawing is skipped this frame
+        """
+        if not self.occlusion_culling:
+            return
+
+        covered = self.covered_windows()
+        for w in self.windows:
+            w.is_occluded = w in covered
+
+    def render_uncovered_windows(self, covered: set):
+        """
+        Draws the windows that were hidden at the start of the frame but show again after the windows above them moved
+        """
+        for w in self.windows:
+            if w.is_occluded and w not in covered:
+                w.is_occluded = False
+                if w.is_visible:
+                    w.drawing_update()
+                    if not w.is_minimized:
+                        w.blit_elements()
+
+    def window_selection(self):
+        top_layer_window = self.top_window
+
+        # only the top layer window under the mouse can be mouse-overed/clicked
+        for w in self.windows:
+            if w is not top_layer_window:
+                w.reset_mouse_over_flags()
+
+        # this alternative happens when mouse is over 1 or more windows
+        # if they are overlapping each other,
+        # top_layer_window is the window amongst them with the highest layer number
+        if top_layer_window:
+            self.buttons_mouse_over_internal(top_layer_window)
+
+    def update_hit_index(self):
+        """
+        Keeps the spatial index in sync with where the windows are on screen.
+        Only windows that have moved, resized, opened, closed or minimized since last frame are re-indexed
+        """
+        for w in self.windows:
+            if w.is_visible:
+                self.hit_index.update(w, (int(w.pos[0]), int(w.pos[1]), w.rect.w, w.rect.h))
+            elif w in self.hit_index:
+                self.hit_index.remove(w)
+
+    def test_multiple_window_collision(self):
+        """
+        Returns the top layer visible window under the mouse, or None
+        """
+        # if multiple windows are stacked, only the one in the front will be mouse-overed/clicked
+        # only windows in the same spatial index cell as the mouse need to be checked
+        mx, my = self.input.pos
+        hits = self.hit_index.at_point(mx, my)
+
+        if not hits:
+            return None
+
+        return max(hits, key=lambda w: w.layer)
+
+    def adjusted_mouse_rect_collision(self, window, rect):
+        mx, my = self.input.pos
+
+        # convert to screen coordinates
+        scrx = mx - window.pos[0]
+        scry = my - window.pos[1]
+
+        if rect.collidepoint(scrx, scry):
+            return True
+
+        return False
+
+    def buttons_mouse_over_internal(self, window):
+        """
+        Checks if mouse is over any window part and if the part is clicked
+        If a mouse click registers, posts an event that pywindowframes caught the click
+        """
+
+        # reset flags
+        window.reset_mouse_over_flags()
+
+        # no click detection if window is not visible
+        if not window.is_visible:
+            return 0
+
+        if self.adjusted_mouse_rect_collision(window, window.border_rect):
+            window.m_border_rect = True
+
+            # minimize button clicked
+            if window.can_be_minimized and self.adjusted_mouse_rect_collision(window, window.minimize_button_rect):
+                window.m_minimize_button = True
+
+                if self.mouse0_cd():
+
+                    if window.is_minimized:
+                        self.maximize(window)
+
+                    elif not window.is_minimized:
+                        self.minimize(window)
+
+                    # post event that pywindowframes caught the mouse click
+                    self.post_event(Event(PYWINDOWFRAMES_CLICKED, window))
+
+            # close button clicked
+            elif self.adjusted_mouse_rect_collision(window, window.close_button_rect):
+
+                window.m_close_button = True
+
+                if self.mouse0_cd():
+
+                    window.close()
+
+                    # post event that pywindowframes caught the mouse click
+                    self.post_event(Event(PYWINDOWFRAMES_CLICKED, window))
+
+            # top border is clicked but no button in top border
+            else:
+                if self.input.buttons[0]:
+
+                    window.is_dragged = True
+                    window.focus_window()
+
+                    # post event that pywindowframes caught the mouse click
+                    self.post_event(Event(PYWINDOWFRAMES_CLICKED, window))
+
+        # window rect collision
+        if self.adjusted_mouse_rect_collision(window, window.rect):
+
+            window.m_window_rect = True
+
+            if not window.is_minimized:
+                if self.mouse0_cd():
+                    if tracing.enabled:
+                        tracing.trace("input", "%s clicked", window.window_title)
+                    window.focus_window()
+
+                    # post event that pywindowframes caught the mouse click
+                    self.post_event(Event(PYWINDOWFRAMES_CLICKED, window))
+
+        else:
+            window.m_window_rect = False
+
+    def elements_mouse_over_clicks(self, window):
+        # the top level window under the mouse was found at the start of the frame
+        top_level_window = self.top_window
+
+        # elements can only be mouse-overed in the top level window
+        if top_level_window and window is not top_level_window:
+            return
+
+        for e in window.elements:
+            if self.adjusted_mouse_rect_collision(window, e.rect):
+
+                # only allow clicking on the top level window if several windows are stacked
+                if top_level_window:
+                    if e.window == top_level_window:
+                        e.set_mouse_over()
+                        if tracing.enabled:
+                            tracing.trace("input", "mouse over %s in top level window", e.name)
+
+                        if self.mouse0_cd(elem=True):
+                            e.on_click()
+
+                            # post event that pywindowframes caught the mouse click
+                            self.post_event(Event(PYWINDOWFRAMES_CLICKED, window))
+
+                # if windows are not stacked, allow mouse over and clicking as usual
+                else:
+                    e.set_mouse_over()
+                    if tracing.enabled:
+                        tracing.trace("input", "mouse over %s (no overlapping windows at mouse pos)", e.name)
+
+                    if self.mouse0_cd(elem=True):
+                        e.on_click()
+
+                        # post event that pywindowframes caught the mouse click
+                        self.post_event(Event(PYWINDOWFRAMES_CLICKED, window))
+
+    """
+    MAXIMIZE / MINIMIZE 
+    """
+
+    def maximize(self, window):
+        self.release_minimize_position(window)
+        window.pos = window.old_pos
+        window.expand_window_title()
+        window.is_minimized = False
+
+    def minimize(self, window):
+        """
+        Minimizes window
+        """
+        if window.can_be_minimized:
+            window.old_pos = window.pos
+
+            # get a valid position
+            window.pos = self.get_minimize_position(window)
+
+            window.is_minimized = True
+
+    def get_dock(self, window) -> Dock:
+        """
+        Minimized windows are docked per target surface (and minimized size)
+        """
+        key = window.target_surface, tuple(window.minimized_size)
+        dock = self.docks.get(key)
+
+        if dock is None:
+            dock = self.docks[key] = Dock(window.target_surface.get_size(), window.minimized_size)
+
+        return dock
+
+    def get_minimize_position(self, window) -> list[int, int]:
+        """
+        Gives the window the first available dock slot: left to right along the bottom of the target surface,
+        filling rows upwards when a row is full
+        """
+        return self.get_dock(window).acquire(window)
+
+    def release_minimize_position(self, window):
+        dock = self.docks.get((window.target_surface, tuple(window.minimized_size)))
+        if dock:
+            dock.release(window)
+
+    def update_docks(self):
+        """
+        Moves minimized windows to their new dock position if their target surface has been resized
+        """
+        for (target_surface, _), dock in self.docks.items():
+            if target_surface.get_size() != dock.surface_size:
+                for window, position in dock.reflow(target_surface.get_size()):
+                    window.pos = position
+
+    def open_or_close_window(self, window):
+        for w in self.windows:
+            if w == window:
+
+                if w.is_visible and not w.is_minimized:
+                    w.close()
+
+                elif w.is_visible and w.is_minimized:
+                    self.maximize(window)
+
+                elif not w.is_visible:
+                    if w.is_minimized:
+                        self.maximize(window)
+                    w.open()
+
+    """
+    IDLE FRAMES
+    """
+
+    def set_idle_skipping(self, enabled: bool = True):
+        """
+        When enabled, update() skips all window, element and drawing updates in frames where nothing can have changed:
+        * the mouse did not move or scroll, and no mouse button is pressed, held or released
+        * no window moved, opened, closed, (un)minimized, changed depth, chrome or title, or was marked dirty
+        * no element has changed and no DynamicSurface is due for an update
+        * the previous frame did not change anything either
+        The window surfaces of the previous frame are blitted again instead ("dirty" compositing mode blits nothing).
+
+        NOTE: If you change elements or window surfaces from outside the custom_* methods, call window.mark_dirty(),
+        otherwise the change may not show until the mouse moves
+        """
+        self.idle_skipping = enabled
+        self.last_idle_signature = None
+        self.idle_frames = 0
+
+    def idle_signature(self) -> tuple:
+        return self.z_order.top, tuple(w.idle_signature() for w in self.windows)
+
+    def is_idle_frame(self) -> bool:
+        """
+        True if this frame can be skipped, see set_idle_skipping()
+        """
+        if self.last_idle_signature is None or not self.input.is_idle():
+            return False
+
+        # an element changing on its own stays due every frame, which the signature can't tell apart from idle
+        if any(w.elements_need_update() for w in self.windows):
+            return False
+
+        return self.idle_signature() == self.last_idle_signature
+
+    def is_idle(self) -> bool:
+        """
+        True if the last update() was skipped because nothing changed
+        """
+        return self.idle_frames > 0
+
+    def suggest_tick_rate(self, active: int = 60, idle: int = 10, idle_after: int = 30) -> int:
+        """
+        Frame rate the main loop can run at. Lowering it while the UI is idle saves CPU, and the first input brings it
+        back up. Only useful with set_idle_skipping() enabled, otherwise active is always returned
+
+            clock.tick(pwf.suggest_tick_rate())
+
+        :param active: frame rate while anything is happening
+        :param idle: frame rate while idle
+        :param idle_after: amount of skipped frames in a row before idle is suggested
+        """
+        if self.idle_frames >= idle_after:
+            return idle
+        return active
+
+    """
+    EVENT HANDLING
+    """
+
+    def post_event(self, event: Event | tuple[object, str]):
+        """
+        Post event to the event queue
+        format: Event or (window_obj, event_string)
+        Handlers registered with on() are called first. If one of them returns True, the event is not queued.
+        Events already in the queue are ignored (see configure_event_queue)
+        """
+        event = to_event(event)
+
+        if self.event_handlers and self.event_handlers.dispatch(event):
+            return
+
+        self.event_queue.post(event)
+
+    def on(self, kind: str, handler, window=None, element=None):
+        """
+        Registers handler to be called directly when a matching event is posted. Returns handler
+
+        :param kind: event kind (e.g. "was_clicked") or full event string (e.g. "buttonname-was_clicked")
+        :param handler: function taking the event. Return True from it to consume the event (it will not be queued)
+        :param window: only events from this window
+        :param element: only events from this element
+        """
+        return self.event_handlers.on(kind, handler, window, element)
+
+    def off(self, kind: str, handler, window=None, element=None):
+        """
+        Unregisters a handler, use the same arguments as when calling on()
+        """
+        self.event_handlers.off(kind, handler, window, element)
+
+    def pop_event(self) -> Event | None:
+        """
+        Returns event if one is in queue
+        If queue is empty, returns None
+        """
+        return self.event_queue.pop()
+
+    def drain_events(self) -> list[Event]:
+        """
+        Returns all events in the queue in the order they were posted, and empties the queue
+        """
+        return self.event_queue.drain()
+
+    def poll_queue(self) -> bool:
+        return bool(self.event_queue)
+
+    def configure_event_queue(self, capacity: int = None, overflow: str = "drop", dedupe=True):
+        """
+        :param capacity: max amount of queued events, None for unlimited (default)
+        :param overflow: when the queue is full, "drop" ignores new events, "overwrite" throws away the oldest event
+        :param dedupe: True ignores events already in the queue (default), False allows duplicates,
+                       or a set of event strings to only deduplicate those
+        """
+        queue = EventQueue(capacity, overflow, dedupe)
+        for event in self.event_queue.drain():
+            queue.post(event)
+
+        self.event_queue = queue
+
+    # click detection
+    def mouse0_cd(self, elem=False):
+        """
+        Call this to check if mouse button 0 (left) has been clicked
+        Only returns True on the frame the button went down, and only once per frame for window buttons and once for
+        elements, so a held button is a single click
+        :return bool:
+        """
+        if elem:
+            return self.input.click("element")
+
+        return self.input.click("window")
+
+    def get_input(self) -> InputState:
+        """
+        Returns this frame's mouse input snapshot
+        """
+        return self.input
+
+
+def current_size(window) -> list[int, int]:
+    """
+    Size of window as it is now, its surface keeps the size it was last drawn with until the window is drawn again
+    """
+    return window.minimized_size if window.is_minimized else window.size
+
+
+def subtract_rects(rect: pg.Rect, rects: list[pg.Rect]) -> list[pg.Rect]:
+    """
+    Returns the parts of rect that none of rects cover, as a list of rects. Empty if rect is completely covered
+    """
+    remaining = [rect]
+    for cover in rects:
+        pieces = []
+        for r in remaining:
+            if not r.colliderect(cover):
+                pieces.append(r)
+                continue
+
+            # above and below the cover, then left and right of it
+            if cover.top > r.top:
+                pieces.append(pg.Rect(r.left, r.top, r.w, cover.top - r.top))
+            if cover.bottom < r.bottom:
+                pieces.append(pg.Rect(r.left, cover.bottom, r.w, r.bottom - cover.bottom))
+            top = max(r.top, cover.top)
+            bottom = min(r.bottom, cover.bottom)
+            if cover.left > r.left:
+                pieces.append(pg.Rect(r.left, top, cover.left - r.left, bottom - top))
+            if cover.right < r.right:
+                pieces.append(pg.Rect(cover.right, top, r.right - cover.right, bottom - top))
+
+        remaining = pieces
+        if not remaining:
+            break
+
+    return remaining
+
+
+def merge_rects(rects: list[pg.Rect]) -> list[pg.Rect]:
+    """
+    Merges overlapping rects into their union so no screen area is blitted twice
+    """
+    merged = []
+    for rect in rects:
+        rect = rect.copy()
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+
+    return merged
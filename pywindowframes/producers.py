@@ -0,0 +1,128 @@
+"""
+Worker pools for DynamicSurface producers.
+
+A DynamicSurface with execution="thread" or "process" doesn't call its surface_to_blit_function on the render thread.
+The call is submitted here as a job, and the element keeps showing the last finished surface until the job is done.
+
+Thread jobs return the produced surface as it is. pygame surfaces can't be sent between processes, so process jobs
+send back (pixel bytes, size, format, colorkey) and the surface is rebuilt on the render thread. Producers run in a
+process must be picklable, i.e. functions defined at module level.
+
+Both pools are made on first use, and have a fixed amount of workers so slow producers queue up instead of taking
+over the machine.
+"""
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+import pygame as pg
+
+
+EXECUTIONS = ("sync", "thread", "process")
+
+
+class Unchanged:
+    """
+    Returned by a producer when its surface would look the same as last time
+    """
+    def __repr__(self):
+        return "UNCHANGED"
+
+    def __reduce__(self):
+        # unpickles as the same object, so it can be returned from a worker process
+        return "UNCHANGED"
+
+
+UNCHANGED = Unchanged()
+
+# execution -> max amount of workers, None lets concurrent.futures decide
+workers = {"thread": 4, "process": None}
+
+# execution -> executor
+_pools = {}
+
+
+def get_pool(execution: str):
+    pool = _pools.get(execution)
+    if pool is None:
+        if execution == "thread":
+            pool = ThreadPoolExecutor(workers["thread"], thread_name_prefix="pywindowframes-producer")
+        elif execution == "process":
+            pool = ProcessPoolExecutor(workers["process"])
+        else:
+            raise ValueError(f"no pool for execution {execution!r}")
+        _pools[execution] = pool
+    return pool
+
+
+def set_workers(execution: str, amount: int = None):
+    """
+    Sets the amount of workers of the "thread" or "process" pool. A running pool is shut down (after its jobs are
+    done) and remade on the next job
+    """
+    assert execution in ("thread", "process"), "execution must be 'thread' or 'process'"
+    workers[execution] = amount
+
+    pool = _pools.pop(execution, None)
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+
+def shutdown(wait: bool = True):
+    """
+    Shuts down both pools. They are remade if another job is submitted
+    """
+    for pool in _pools.values():
+        pool.shutdown(wait=wait, cancel_futures=True)
+    _pools.clear()
+
+
+"""
+JOBS
+"""
+
+
+def run_timed(function) -> tuple:
+    """
+    Returns (surface, seconds spent in function)
+    """
+    start = perf_counter()
+    surface = function()
+    return surface, perf_counter() - start
+
+
+def run_timed_in_process(function) -> tuple:
+    """
+    Same as run_timed(), with the surface turned into something that can be sent back from a worker process
+    """
+    surface, elapsed = run_timed(function)
+    if not isinstance(surface, pg.Surface):
+        return surface, elapsed
+
+    pixel_format = "RGBA" if surface.get_flags() & pg.SRCALPHA else "RGB"
+    return (pg.image.tobytes(surface, pixel_format), surface.get_size(), pixel_format, surface.get_colorkey()), elapsed
+
+
+def submit(execution: str, function) -> Future:
+    """
+    Starts a job calling function on the "thread" or "process" pool
+    """
+    if execution == "process":
+        return get_pool("process").submit(run_timed_in_process, function)
+    return get_pool("thread").submit(run_timed, function)
+
+
+def job_result(job: Future) -> tuple:
+    """
+    Returns (surface, seconds spent in the producer) of a finished job. The surface may be UNCHANGED or None.
+    Raises whatever the producer raised
+    """
+    surface, elapsed = job.result()
+
+    if isinstance(surface, tuple):
+        pixels, size, pixel_format, colorkey = surface
+        surface = pg.image.frombuffer(pixels, size, pixel_format)
+        if colorkey is not None:
+            surface.set_colorkey(colorkey)
+
+    return surface, elapsed
@@ -0,0 +1,323 @@
+"""
+Opt-in timing of everything update() does.
+
+    pwf.profiling.enable()
+    ...
+    pwf.update(events)
+    ...
+    print(pwf.profiling.report())
+
+When enabled, the time spent is recorded per update() phase, per window phase (early, drawing, elements, late), per
+element class, and per custom_* hook. Hooks that take longer than slow_hook_ms are flagged in slow_hooks.
+Recent samples are kept in RollingHistograms, so the stats describe the last few hundred frames and not the
+whole run.
+
+When disabled (the default), update() only checks the enabled flag once per phase, window and hook site.
+"""
+from collections import deque
+from time import perf_counter
+import weakref
+
+
+enabled = False
+
+# hooks slower than this are flagged, in milliseconds
+slow_hook_ms = 2.0
+
+# samples kept per histogram
+history = 600
+
+# amount of update() calls profiled
+frame_count = 0
+
+_frame_times = None
+# update() phase -> RollingHistogram
+_phases = {}
+# window -> {window phase: RollingHistogram}, windows that are garbage collected disappear
+_windows = weakref.WeakKeyDictionary()
+# element class name -> RollingHistogram
+_elements = {}
+# "ClassName.hook_name" -> RollingHistogram
+_hooks = {}
+# (frame, "ClassName.hook_name", owner, ms) of the most recent slow hooks
+_slow_hooks = deque(maxlen=100)
+
+
+class RollingHistogram:
+    """
+    Keeps the last size samples (in seconds) and the count and total of all samples ever added
+    """
+    def __init__(self, size: int = 600):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def mean(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(self.samples) / len(self.samples)
+
+    def max(self) -> float:
+        if not self.samples:
+            return 0.0
+        return max(self.samples)
+
+    def percentile(self, p: float) -> float:
+        """
+        :param p: 0 - 100
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+    def buckets(self, edges) -> list[int]:
+        """
+        Returns the amount of recent samples in each bucket. Bucket i counts samples below edges[i] (and at or above
+        edges[i - 1]), the last bucket counts samples at or above edges[-1]
+
+        :param edges: ascending bucket edges in seconds
+        """
+        counts = [0] * (len(edges) + 1)
+        for sample in self.samples:
+            i = 0
+            while i < len(edges) and sample >= edges[i]:
+                i += 1
+            counts[i] += 1
+        return counts
+
+    def summary(self) -> dict:
+        """
+        Recent samples in milliseconds, plus the count and total of all samples
+        """
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.mean() * 1000,
+            "p50_ms": self.percentile(50) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max() * 1000,
+        }
+
+
+"""
+SWITCHING
+"""
+
+
+def enable(slow_hook_threshold_ms: float = None, samples: int = None):
+    """
+    :param slow_hook_threshold_ms: flag custom hooks slower than this
+    :param samples: amount of recent samples kept per histogram. Changing it resets the stats
+    """
+    global enabled, slow_hook_ms, history
+
+    if slow_hook_threshold_ms is not None:
+        slow_hook_ms = slow_hook_threshold_ms
+    if samples is not None and samples != history:
+        history = samples
+        reset()
+
+    enabled = True
+
+
+def disable():
+    """
+    Stops recording. The stats recorded so far are kept
+    """
+    global enabled
+    enabled = False
+
+
+def reset():
+    global frame_count, _frame_times
+
+    frame_count = 0
+    _frame_times = None
+    _phases.clear()
+    _windows.clear()
+    _elements.clear()
+    _hooks.clear()
+    _slow_hooks.clear()
+
+
+"""
+RECORDING
+"""
+
+
+def histogram(table: dict, key) -> RollingHistogram:
+    hist = table.get(key)
+    if hist is None:
+        hist = table[key] = RollingHistogram(history)
+    return hist
+
+
+class FrameTimer:
+    """
+    Times the phases of one update() call. Call lap() after each phase and stop() at the end of the frame
+    """
+    def __init__(self):
+        self.start = self.last = perf_counter()
+
+    def lap(self, phase: str):
+        now = perf_counter()
+        histogram(_phases, phase).add(now - self.last)
+        self.last = now
+
+    def stop(self):
+        global frame_count, _frame_times
+
+        if _frame_times is None:
+            _frame_times = RollingHistogram(history)
+        _frame_times.add(perf_counter() - self.start)
+        frame_count += 1
+
+
+class NullTimer:
+    def lap(self, phase: str):
+        pass
+
+    def stop(self):
+        pass
+
+
+_null_timer = NullTimer()
+
+
+def start_frame():
+    """
+    Returns a FrameTimer, or a timer that does nothing when profiling is disabled
+    """
+    if not enabled:
+        return _null_timer
+    return FrameTimer()
+
+
+def time_window_phase(window, phase: str, function):
+    """
+    Calls function and records the time under the window's phase
+    """
+    start = perf_counter()
+    function()
+    elapsed = perf_counter() - start
+
+    phases = _windows.get(window)
+    if phases is None:
+        phases = _windows[window] = {}
+    histogram(phases, phase).add(elapsed)
+
+
+def update_elements(elements):
+    """
+    Calls update() on each element and records the time under its class
+    """
+    for e in elements:
+        start = perf_counter()
+        e.update()
+        histogram(_elements, e.__class__.__name__).add(perf_counter() - start)
+
+
+def call_hook(owner, hook):
+    """
+    Calls a custom_* hook and records the time under "OwnerClass.hook_name".
+    Flags the hook if it took longer than slow_hook_ms
+    """
+    start = perf_counter()
+    result = hook()
+    elapsed = perf_counter() - start
+
+    name = f"{owner.__class__.__name__}.{hook.__name__}"
+    histogram(_hooks, name).add(elapsed)
+
+    if elapsed * 1000 > slow_hook_ms:
+        _slow_hooks.append((frame_count, name, owner, elapsed * 1000))
+
+    return result
+
+
+"""
+STATS
+"""
+
+
+def get_stats() -> dict:
+    """
+    Returns
+    {
+        "frames": amount of profiled update() calls,
+        "frame": summary of whole update() calls,
+        "phases": {update() phase: summary},
+        "windows": {window: {window phase: summary}},
+        "elements": {element class name: summary of element.update()},
+        "hooks": {"ClassName.hook_name": summary},
+        "slow_hooks": [(frame, "ClassName.hook_name", owner, ms), ...] most recent last,
+    }
+    where every summary is a RollingHistogram.summary() dict
+    """
+    return {
+        "frames": frame_count,
+        "frame": _frame_times.summary() if _frame_times else RollingHistogram().summary(),
+        "phases": {phase: hist.summary() for phase, hist in _phases.items()},
+        "windows": {window: {phase: hist.summary() for phase, hist in phases.items()}
+                    for window, phases in _windows.items()},
+        "elements": {name: hist.summary() for name, hist in _elements.items()},
+        "hooks": {name: hist.summary() for name, hist in _hooks.items()},
+        "slow_hooks": list(_slow_hooks),
+    }
+
+
+def slow_hooks() -> list:
+    """
+    [(frame, "ClassName.hook_name", owner, ms), ...] of the most recent hooks slower than slow_hook_ms
+    """
+    return list(_slow_hooks)
+
+
+def slowest_windows(amount: int = 5) -> list:
+    """
+    Returns [(window, mean ms per frame), ...] for the windows taking the most time, slowest first
+    """
+    totals = [(window, sum(hist.mean() for hist in phases.values()) * 1000) for window, phases in _windows.items()]
+    totals.sort(key=lambda item: item[1], reverse=True)
+    return totals[:amount]
+
+
+def report(amount: int = 5) -> str:
+    """
+    Readable summary of the stats
+    """
+    stats = get_stats()
+    frame = stats["frame"]
+
+    lines = [f"{stats['frames']} frames, mean {frame['mean_ms']:.2f} ms, p99 {frame['p99_ms']:.2f} ms, "
+             f"max {frame['max_ms']:.2f} ms"]
+
+    def add_table(title, table):
+        lines.append(title)
+        for name, summary in sorted(table.items(), key=lambda item: item[1]["mean_ms"], reverse=True)[:amount]:
+            lines.append(f"    {name:<40} mean {summary['mean_ms']:8.3f} ms  p99 {summary['p99_ms']:8.3f} ms")
+
+    add_table("update() phases:", stats["phases"])
+
+    lines.append("slowest windows:")
+    for window, ms in slowest_windows(amount):
+        lines.append(f"    {getattr(window, 'window_title', window)!s:<40} mean {ms:8.3f} ms")
+
+    add_table("element classes:", stats["elements"])
+    add_table("hooks:", stats["hooks"])
+
+    if stats["slow_hooks"]:
+        lines.append(f"slow hooks (> {slow_hook_ms} ms):")
+        for frame_number, name, owner, ms in stats["slow_hooks"][-amount:]:
+            lines.append(f"    frame {frame_number}: {name} took {ms:.2f} ms")
+
+    return "\n".join(lines)
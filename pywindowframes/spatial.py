@@ -0,0 +1,96 @@
+"""
+Spatial index of window screen rects, used for mouse hit-testing.
+
+The screen is divided into a uniform grid of square cells. Every window is registered in all cells its screen rect
+touches, so finding the windows under a point only needs to look at the few windows in a single cell, no matter how
+many windows there are in total.
+"""
+
+
+class SpatialGrid:
+    def __init__(self, cell_size: int = 128):
+        self.cell_size = cell_size
+
+        # (cell x, cell y) -> set of windows touching that cell
+        self.cells = {}
+
+        # window -> (x, y, w, h) screen rect it is registered with
+        self.rects = {}
+
+    def __contains__(self, window):
+        return window in self.rects
+
+    def __len__(self):
+        return len(self.rects)
+
+    def cell_range(self, rect):
+        x, y, w, h = rect
+        size = self.cell_size
+
+        for cx in range(x // size, (x + max(w, 1) - 1) // size + 1):
+            for cy in range(y // size, (y + max(h, 1) - 1) // size + 1):
+                yield cx, cy
+
+    def update(self, window, rect):
+        """
+        Registers window with its current screen rect. Does nothing if the rect has not changed
+        :param rect: (x, y, w, h) of ints
+        """
+        old_rect = self.rects.get(window)
+        if old_rect == rect:
+            return
+
+        if old_rect is not None:
+            self.remove(window)
+
+        self.rects[window] = rect
+        for cell in self.cell_range(rect):
+            windows = self.cells.get(cell)
+            if windows is None:
+                windows = self.cells[cell] = set()
+            windows.add(window)
+
+    def remove(self, window):
+        rect = self.rects.pop(window, None)
+        if rect is None:
+            return
+
+        for cell in self.cell_range(rect):
+            windows = self.cells[cell]
+            windows.discard(window)
+            if not windows:
+                del self.cells[cell]
+
+    def at_point(self, x, y) -> list:
+        """
+        Returns all windows whose rect contains the point
+        """
+        windows = self.cells.get((x // self.cell_size, y // self.cell_size))
+        if not windows:
+            return []
+
+        hits = []
+        for window in windows:
+            rx, ry, rw, rh = self.rects[window]
+            if rx <= x < rx + rw and ry <= y < ry + rh:
+                hits.append(window)
+
+        return hits
+
+    def in_rect(self, rect) -> set:
+        """
+        Returns all windows whose rect overlaps rect
+        :param rect: (x, y, w, h) of ints
+        """
+        x, y, w, h = rect
+        hits = set()
+
+        for cell in self.cell_range(rect):
+            for window in self.cells.get(cell, ()):
+                if window in hits:
+                    continue
+                rx, ry, rw, rh = self.rects[window]
+                if rx < x + w and x < rx + rw and ry < y + h and y < ry + rh:
+                    hits.add(window)
+
+        return hits
@@ -0,0 +1,72 @@
+"""
+Surfaces in the right pixel format.
+
+Blitting from a surface with a different pixel format than the destination converts every pixel on every blit.
+Windows and elements therefore make their surfaces with make_surface(), in the pixel format of the surface they
+end up on. Surfaces that are blitted many times but never drawn on, like rendered text, are converted once with
+prepare_for_blitting(), which also turns on RLE acceleration for their colorkey.
+"""
+import pygame as pg
+
+
+# pixels of this color are transparent in window and element surfaces
+COLORKEY = (1, 1, 1)
+
+
+def make_surface(size, target: pg.Surface = None, colorkey=COLORKEY) -> pg.Surface:
+    """
+    Returns a new surface filled with colorkey
+
+    :param size: (w, h)
+    :param target: surface the new surface will (eventually) be blitted to. Its pixel format is used, unless it has
+                   per-pixel alpha, in which case the default (display) format is used
+    :param colorkey: transparent color, None for an opaque black surface
+    """
+    if target is not None and not target.get_flags() & pg.SRCALPHA:
+        surface = pg.Surface(size, 0, target)
+    else:
+        surface = pg.Surface(size)
+
+    if colorkey is not None:
+        surface.fill(colorkey)
+        surface.set_colorkey(colorkey)
+
+    return surface
+
+
+def prepare_for_blitting(surface: pg.Surface) -> pg.Surface:
+    """
+    Returns surface converted to the display format, with RLE acceleration if it has a colorkey.
+    Only for surfaces that are not drawn on afterwards, RLE surfaces are slow to change.
+    Returns surface as it is if no display mode has been set
+    """
+    if pg.display.get_surface() is None:
+        return surface
+
+    if surface.get_flags() & pg.SRCALPHA:
+        return surface.convert_alpha()
+
+    colorkey = surface.get_colorkey()
+    surface = surface.convert()
+    if colorkey is not None:
+        surface.set_colorkey(colorkey, pg.RLEACCEL)
+
+    return surface
+
+
+def blit_sequence(items, area_size) -> list:
+    """
+    Returns the (surface, pos) items that would show up on a surface of area_size, in the same order, ready for
+    Surface.blits(). Zero-size surfaces and surfaces outside of the area are left out
+
+    :param items: iterable of (surface, pos)
+    :param area_size: (w, h) of the surface blitted to
+    """
+    area_w, area_h = area_size
+    sequence = []
+    for surface, pos in items:
+        w, h = surface.get_size()
+        x, y = pos
+        if w and h and x < area_w and y < area_h and x + w > 0 and y + h > 0:
+            sequence.append((surface, pos))
+    return sequence
@@ -0,0 +1,163 @@
+"""
+Opt-in tracing to a bounded in-memory ring buffer, in place of debug prints.
+
+    pwf.tracing.enable("input", "events")
+    ...
+    pwf.update(events)
+    ...
+    pwf.tracing.dump()
+
+Trace records are put in categories: input, layout, draw, events and grid. Only the enabled categories are recorded,
+and only the most recent records are kept, so tracing can be left on in a running program without growing or
+printing anything until dump() is called.
+
+Call sites in pywindowframes check the enabled flag before calling trace(), so disabled tracing costs one attribute
+lookup. Functions decorated with @traced(category) are only wrapped if their category is given in the
+PYWINDOWFRAMES_TRACE environment variable when pywindowframes is imported ("all", or e.g. "layout,grid").
+Otherwise the decorator returns the function itself and costs nothing at all. The variable also enables tracing of
+those categories from the start.
+"""
+from collections import deque
+from functools import wraps
+from time import perf_counter
+import os
+import sys
+
+
+CATEGORIES = ("input", "layout", "draw", "events", "grid")
+
+enabled = False
+
+# categories recorded while enabled
+categories = frozenset()
+
+# records kept in the ring buffer
+capacity = 2000
+
+# (seconds since tracing started, category, message) of the most recent records
+_records = deque(maxlen=capacity)
+_start = perf_counter()
+
+
+def categories_from_env() -> frozenset:
+    value = os.environ.get("PYWINDOWFRAMES_TRACE", "").strip().lower()
+    if not value or value in ("0", "false", "off"):
+        return frozenset()
+    if value in ("1", "true", "on", "all", "*"):
+        return frozenset(CATEGORIES)
+    return frozenset(c.strip() for c in value.split(",")) & frozenset(CATEGORIES)
+
+
+# categories whose @traced functions are wrapped, fixed at import
+decorated = categories_from_env()
+
+
+"""
+SWITCHING
+"""
+
+
+def enable(*names: str, size: int = None):
+    """
+    :param names: categories to record, all categories if none are given
+    :param size: amount of records kept. Changing it throws away the records so far
+    """
+    global enabled, categories, capacity, _records
+
+    for name in names:
+        assert name in CATEGORIES, f"unknown trace category {name!r}, must be one of {CATEGORIES}"
+
+    if size is not None and size != capacity:
+        assert size > 0, "size must be at least 1"
+        capacity = size
+        _records = deque(maxlen=capacity)
+
+    categories = frozenset(names or CATEGORIES)
+    enabled = True
+
+
+def disable():
+    """
+    Stops recording. The records so far are kept
+    """
+    global enabled
+    enabled = False
+
+
+def clear():
+    global _start
+    _records.clear()
+    _start = perf_counter()
+
+
+"""
+RECORDING
+"""
+
+
+def trace(category: str, message: str, *args):
+    """
+    Records message % args if category is enabled. Callers in hot paths check tracing.enabled first
+    """
+    if enabled and category in categories:
+        _records.append((perf_counter() - _start, category, message % args if args else message))
+
+
+def traced(category: str):
+    """
+    Decorator recording calls to and returns from the decorated method in category. The first argument (self) isn't
+    recorded. Returns the function unchanged unless category was in PYWINDOWFRAMES_TRACE at import
+    """
+    assert category in CATEGORIES, f"unknown trace category {category!r}, must be one of {CATEGORIES}"
+
+    def decorator(function):
+        if category not in decorated:
+            return function
+
+        name = function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not (enabled and category in categories):
+                return function(*args, **kwargs)
+
+            trace(category, "%s%r%s", name, args[1:] if args else args, f" {kwargs!r}" if kwargs else "")
+            start = perf_counter()
+            result = function(*args, **kwargs)
+            trace(category, "%s -> %r (%.3f ms)", name, result, (perf_counter() - start) * 1000)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+"""
+REPORTING
+"""
+
+
+def records(category: str = None) -> list:
+    """
+    Returns the recorded (seconds, category, message), oldest first
+    """
+    if category is None:
+        return list(_records)
+    return [record for record in _records if record[1] == category]
+
+
+def format_records(category: str = None) -> str:
+    return "\n".join(f"{seconds:10.4f} [{name}] {message}" for seconds, name, message in records(category))
+
+
+def dump(file=None, category: str = None):
+    """
+    Writes the recorded messages to file, sys.stderr by default
+    """
+    text = format_records(category)
+    if text:
+        print(text, file=file if file is not None else sys.stderr)
+
+
+if decorated:
+    enable(*decorated)
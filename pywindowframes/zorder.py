@@ -0,0 +1,234 @@
+"""
+Window depth ordering.
+
+Windows are kept back to front in a doubly linked list, so bringing a window to the front or sending it to the back
+is O(1), and so is raising a window above another one as long as there is room between their layer numbers.
+Every window also gets a layer number (window.layer) that increases back to front. Layer numbers are spaced out so
+raising a window in between two others rarely runs out of room. When it does, only the windows around the gap are
+renumbered, as few as it takes to spread them out again. Layer numbers are compacted as soon as they have grown much
+larger than the amount of windows, so they don't grow forever in long running sessions.
+"""
+
+
+class ZOrder:
+    # distance between layer numbers when (re)numbering
+    layer_spacing = 64
+
+    # smallest distance between layer numbers when making room between two windows
+    min_spacing = 16
+
+    def __init__(self):
+        # window -> the window directly above/below it
+        self.above = {}
+        self.below = {}
+
+        self.bottom = None
+        self.top = None
+
+    def __len__(self):
+        return len(self.above)
+
+    def __contains__(self, window):
+        return window in self.above
+
+    def __iter__(self):
+        """
+        Iterates back to front (drawing order)
+        """
+        window = self.bottom
+        while window is not None:
+            next_window = self.above[window]
+            yield window
+            window = next_window
+
+    def front_to_back(self):
+        """
+        Iterates front to back (mouse collision order)
+        """
+        window = self.top
+        while window is not None:
+            next_window = self.below[window]
+            yield window
+            window = next_window
+
+    @property
+    def highest_layer_number(self) -> int:
+        if self.top is None:
+            return 0
+        return self.top.layer
+
+    """
+    ORDERING
+    """
+
+    def push(self, window):
+        """
+        Adds a window on top of all other windows
+        """
+        below = self.top
+        self.link(window, below, None)
+        window.layer = below.layer + self.layer_spacing if below else self.layer_spacing
+
+        self.compact_if_needed()
+
+    def remove(self, window):
+        if window not in self:
+            return
+
+        below = self.below.pop(window)
+        above = self.above.pop(window)
+
+        if below is None:
+            self.bottom = above
+        else:
+            self.above[below] = above
+
+        if above is None:
+            self.top = below
+        else:
+            self.below[above] = below
+
+    def bring_to_front(self, window):
+        if self.top is window:
+            return
+
+        self.remove(window)
+        self.push(window)
+
+    def send_to_back(self, window):
+        if self.bottom is window:
+            return
+
+        self.remove(window)
+        self.link(window, None, self.bottom)
+
+        above = self.above[window]
+        window.layer = above.layer - self.layer_spacing if above else self.layer_spacing
+
+        self.compact_if_needed()
+
+    def raise_above(self, window, other):
+        """
+        Puts window directly above other
+        """
+        if window is other or self.below.get(window) is other:
+            return
+
+        self.remove(window)
+        above = self.above[other]
+
+        if above is None:
+            return self.push(window)
+
+        # make room in between other and the window above it
+        if above.layer - other.layer < 2:
+            self.make_room(other, above)
+
+        self.link(window, other, above)
+        window.layer = (other.layer + above.layer) // 2
+
+    def lower_below(self, window, other):
+        """
+        Puts window directly below other
+        """
+        if window is other or self.above.get(window) is other:
+            return
+
+        below = self.below[other]
+        if below is None:
+            return self.send_to_back(window)
+
+        self.raise_above(window, below)
+
+    def link(self, window, below, above):
+        """
+        Inserts window in between below and above (None means bottom/top)
+        """
+        self.below[window] = below
+        self.above[window] = above
+
+        if below is None:
+            self.bottom = window
+        else:
+            self.above[below] = window
+
+        if above is None:
+            self.top = window
+        else:
+            self.below[above] = window
+
+    """
+    LAYER NUMBERS
+    """
+
+    def renumber(self):
+        """
+        Spreads all layer numbers out evenly, back to front, keeping the current order
+        """
+        layer = self.layer_spacing
+        for window in self:
+            window.layer = layer
+            layer += self.layer_spacing
+
+    def make_room(self, low, high):
+        """
+        Spreads out the layer numbers of low and high (directly above low) and of as few windows around them as it
+        takes to leave min_spacing between all of them. Windows outside of that run keep their layer numbers.
+        The run grows by one window on each side until its outer neighbours are far enough apart, or until it reaches
+        the top or bottom, where layer numbers can grow freely
+        """
+        count = 2
+        while True:
+            below = self.below[low]
+            above = self.above[high]
+
+            if above is None:
+                layer = low.layer
+                for window in self.run(low, high):
+                    window.layer = layer
+                    layer += self.layer_spacing
+                break
+
+            if below is None:
+                layer = high.layer - self.layer_spacing * (count - 1)
+                for window in self.run(low, high):
+                    window.layer = layer
+                    layer += self.layer_spacing
+                break
+
+            spacing = (above.layer - below.layer) // (count + 1)
+            if spacing >= self.min_spacing:
+                layer = below.layer
+                for window in self.run(low, high):
+                    layer += spacing
+                    window.layer = layer
+                break
+
+            low = below
+            high = above
+            count += 2
+
+        self.compact_if_needed()
+
+    def run(self, low, high):
+        """
+        Iterates from low up to and including high
+        """
+        window = low
+        while window is not high:
+            next_window = self.above[window]
+            yield window
+            window = next_window
+        yield high
+
+    def compact_if_needed(self):
+        """
+        Renumbers when layer numbers have drifted far away from the range the windows actually need.
+        This happens at most once every few times len(self) operations, which keeps it O(1) amortized
+        """
+        if self.top is None:
+            return
+
+        limit = self.layer_spacing * (len(self) + 1) * 4
+        if self.top.layer > limit or self.bottom.layer < -limit:
+            self.renumber()
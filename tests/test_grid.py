@@ -0,0 +1,63 @@
+"""
+GridOccupancy and GridPacker compared with brute force scans of the same grid.
+"""
+import random
+
+from pywindowframes.grid import GridOccupancy
+from pywindowframes.grid import GridPacker
+
+
+def brute_force_position(grid: GridOccupancy, w, h, start=(0, 0)):
+    # column by column, like GridPacker.find_position()
+    for x in range(start[0], grid.width - w + 1):
+        for y in range(start[1], grid.height - h + 1):
+            if all(not grid.cells or not grid.cells[cy * grid.width + cx]
+                   for cx in range(x, x + w) for cy in range(y, y + h)):
+                return x, y
+    return None
+
+
+def test_occupancy_matches_taken_cells():
+    rng = random.Random(1)
+    grid = GridOccupancy(13, 9)
+    taken = set()
+
+    for _ in range(2000):
+        x, y = rng.randrange(13), rng.randrange(9)
+        w, h = rng.randint(1, 13 - x), rng.randint(1, 9 - y)
+        area = {(cx, cy) for cx in range(x, x + w) for cy in range(y, y + h)}
+
+        if rng.random() < 0.5:
+            grid.occupy(x, y, w, h)
+            taken |= area
+        else:
+            grid.free(x, y, w, h)
+            taken -= area
+
+        assert grid.taken_count(x, y, w, h) == len(area & taken)
+        assert grid.is_free(x, y, w, h) == (not area & taken)
+        assert grid.free_count() == 13 * 9 - len(taken)
+
+
+def test_find_position_is_top_left_most():
+    for seed in range(20):
+        rng = random.Random(seed)
+        grid = GridOccupancy(16, 12)
+        packer = GridPacker(grid)
+        placed = []
+
+        for i in range(300):
+            if placed and rng.random() < 0.4:
+                packer.remove(placed.pop(rng.randrange(len(placed))))
+                continue
+
+            w, h = rng.randint(1, 4), rng.randint(1, 4)
+            start = (rng.randrange(8), rng.randrange(6)) if rng.random() < 0.2 else (0, 0)
+
+            expected = brute_force_position(grid, w, h, start)
+            assert packer.find_position(w, h, start) == expected, (seed, i, w, h, start)
+
+            if expected is not None:
+                element = object()
+                assert packer.place(element, w, h, start) == expected
+                placed.append(element)
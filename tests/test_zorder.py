@@ -0,0 +1,47 @@
+"""
+ZOrder keeps layer numbers increasing back to front through any sequence of reorderings.
+"""
+import random
+
+from pywindowframes.zorder import ZOrder
+
+
+class Window:
+    layer = 0
+
+
+def test_layers_follow_order():
+    rng = random.Random(1)
+    z = ZOrder()
+    windows = [Window() for _ in range(200)]
+    for w in windows:
+        z.push(w)
+
+    # half of the raises go into the same gap, which runs out of room quickly
+    crowded = windows[100]
+    renumbered = []
+    renumber = z.renumber
+    z.renumber = lambda: (renumbered.append(True), renumber())
+
+    for i in range(2000):
+        window = rng.choice(windows)
+        other = crowded if i % 2 else rng.choice(windows)
+        operation = rng.random()
+
+        if operation < 0.6:
+            z.raise_above(window, other)
+            assert window is other or z.below[window] is other
+        elif operation < 0.8:
+            z.lower_below(window, other)
+            assert window is other or z.above[window] is other
+        elif operation < 0.9:
+            z.bring_to_front(window)
+        else:
+            z.send_to_back(window)
+
+        layers = [w.layer for w in z]
+        assert len(layers) == len(windows)
+        assert all(a < b for a, b in zip(layers, layers[1:]))
+
+    # room is made locally, the whole stack is only renumbered to compact drifting layer numbers
+    assert len(renumbered) < 10